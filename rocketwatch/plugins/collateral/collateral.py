@@ -32,12 +32,9 @@ def get_percentiles(percentiles, counts):
 async def collateral_distribution_raw(ctx: Context, distribution):
     e = Embed()
     e.title = "Collateral Distribution"
-    description = "```\n"
-    for collateral, nodes in distribution:
-        description += f"{collateral:>5}%: " \
-                       f"{nodes:>4} {p.plural('node', nodes)}\n"
-    description += "```"
-    e.description = description
+    lines = [f"{collateral:>5}%: {nodes:>4} {p.plural('node', nodes)}"
+             for collateral, nodes in distribution]
+    e.description = "```\n" + "\n".join(lines) + "\n```"
     await ctx.send(embed=e)
 
 
@@ -1,11 +1,15 @@
+import asyncio
 import logging
 import math
 
+from typing import Optional
+
+from cachetools import TTLCache
 from discord.ext.commands import Cog, Context, hybrid_command
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from utils import solidity
 from utils.cfg import cfg
+from utils.db import db
 from utils.shared_w3 import w3
 from utils.rocketpool import rp
 from utils.visibility import is_hidden_weak
@@ -20,11 +24,53 @@ log.setLevel(cfg["log_level"])
 class Constellation(Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb_uri"]).get_database("rocketwatch")
+        self.db = db
+        # chain reads keyed by block number; state can't change within a block
+        self._snapshot_cache = TTLCache(maxsize=4, ttl=12)
 
-    async def _fetch_num_operators(self) -> int:
-        current_block = w3.eth.get_block('latest').number
-        whitelist_contract = rp.get_contract_by_name("Constellation.Whitelist")
+    def _fetch_chain_snapshot(self) -> dict:
+        block_number = w3.eth.block_number
+        if (snapshot := self._snapshot_cache.get(block_number)) is not None:
+            return snapshot
+
+        supernode_contract = rp.get_contract_by_name("Constellation.SuperNodeAccount")
+        distributor_contract = rp.get_contract_by_name("Constellation.OperatorDistributor")
+        info_calls: dict[str, int] = {
+            res.function_name: res.results[0] for res in rp.multicall.aggregate([
+                supernode_contract.functions.getNumMinipools(),
+                supernode_contract.functions.getEthStaked(),
+                supernode_contract.functions.getEthMatched(),
+                supernode_contract.functions.getRplStaked(),
+                supernode_contract.functions.bond(),
+                supernode_contract.functions.maxValidators(),
+                distributor_contract.functions.getTvlEth(),
+                distributor_contract.functions.getTvlRpl(),
+                distributor_contract.functions.minimumStakeRatio()
+            ]).results
+        }
+
+        vault_address_eth: str = rp.get_address_by_name("Constellation.ETHVault")
+        vault_address_rpl: str = rp.get_address_by_name("Constellation.RPLVault")
+        snapshot = {
+            "block_number"            : block_number,
+            "supernode_address"       : supernode_contract.address,
+            "info_calls"              : info_calls,
+            "vault_address_eth"       : vault_address_eth,
+            "vault_balance_eth"       : rp.call("WETH.balanceOf", vault_address_eth),
+            "vault_address_rpl"       : vault_address_rpl,
+            "vault_balance_rpl"       : rp.call("rocketTokenRPL.balanceOf", vault_address_rpl),
+            "rpl_price"               : rp.call("rocketNetworkPrices.getRPLPrice"),
+            "distributor_balance_eth" : w3.eth.getBalance(distributor_contract.address),
+            "distributor_balance_rpl" : rp.call("rocketTokenRPL.balanceOf", distributor_contract.address),
+            "gas_price"               : w3.eth.gas_price
+        }
+        self._snapshot_cache[block_number] = snapshot
+        return snapshot
+
+    async def _fetch_num_operators(self, current_block: Optional[int] = None) -> int:
+        loop = asyncio.get_running_loop()
+        if current_block is None:
+            current_block = (await loop.run_in_executor(None, w3.eth.get_block, "latest")).number
 
         if db_entry := (await self.db.last_checked_block.find_one({"_id": cog_id})):
             last_checked_block = db_entry["block"]
@@ -33,34 +79,72 @@ class Constellation(Cog):
             last_checked_block = 20946650 # contract deployment
             num_operators = 0
 
+        # already caught up, don't issue any log queries
+        if current_block <= last_checked_block:
+            return num_operators
+
+        whitelist_contract = rp.get_contract_by_name("Constellation.Whitelist")
+        # OR all operator count events into a single getLogs filter
+        topic_map: dict[str, str] = {
+            whitelist_contract.events[event_name].build_filter().topics[0]: event_name
+            for event_name in ("OperatorAdded", "OperatorRemoved", "OperatorsAdded", "OperatorsRemoved")
+        }
+
         def _fetch_interval(_from: int, _to: int) -> int:
             _operators = 0
 
-            _operators += len(whitelist_contract.events.OperatorAdded().getLogs(fromBlock=_from, toBlock=_to))
-            _operators -= len(whitelist_contract.events.OperatorRemoved().getLogs(fromBlock=_from, toBlock=_to))
-            for event_log in whitelist_contract.events.OperatorsAdded().get_logs(fromBlock=_from, toBlock=_to):
-                _operators += len(event_log.args.operators)
-            for event_log in whitelist_contract.events.OperatorsAdded().get_logs(fromBlock=_from, toBlock=_to):
-                _operators -= len(event_log.args.operators)
+            logs = w3.eth.get_logs({
+                "address"  : whitelist_contract.address,
+                "topics"   : [list(topic_map)],
+                "fromBlock": _from,
+                "toBlock"  : _to
+            })
+            for raw_log in logs:
+                match (event_name := topic_map[raw_log["topics"][0].hex()]):
+                    case "OperatorAdded":
+                        _operators += 1
+                    case "OperatorRemoved":
+                        _operators -= 1
+                    case "OperatorsAdded" | "OperatorsRemoved":
+                        event_log = whitelist_contract.events[event_name]().processLog(raw_log)
+                        num_changed = len(event_log.args.operators)
+                        _operators += num_changed if (event_name == "OperatorsAdded") else -num_changed
 
             return _operators
 
         request_block_limit = 50_000
+        ranges = []
         b_from = last_checked_block + 1
-        b_to = b_from + request_block_limit
-
-        # catch up to current block with chunked requests
-        while b_to < current_block:
-            num_operators += _fetch_interval(b_from, b_to)
+        while b_from <= current_block:
+            b_to = min(b_from + request_block_limit, current_block)
+            ranges.append((b_from, b_to))
             b_from = b_to + 1
-            b_to = b_from + request_block_limit
-
-        num_operators += _fetch_interval(b_from, current_block)
-        last_checked_block = current_block
 
-        await self.db.last_checked_block.replace_one(
+        # catch up to current block with bounded concurrent requests
+        concurrency = 4
+        # batches between cursor checkpoints (i.e. one write per 32 chunks)
+        checkpoint_interval = 8
+
+        for i in range(0, len(ranges), concurrency):
+            batch = ranges[i:(i + concurrency)]
+            chunk_counts = await asyncio.gather(
+                *[loop.run_in_executor(None, _fetch_interval, b_from, b_to) for b_from, b_to in batch]
+            )
+            num_operators += sum(chunk_counts)
+            last_checked_block = batch[-1][1]
+            # checkpoint progress so a crash mid catch-up doesn't re-scan from the start;
+            # all checkpoints target the same document, so only the latest one matters
+            # and intermediate writes within the window can simply be skipped
+            if (i // concurrency) % checkpoint_interval == (checkpoint_interval - 1):
+                await self.db.last_checked_block.update_one(
+                    {"_id": cog_id},
+                    {"$set": {"block": last_checked_block, "operators": num_operators}},
+                    upsert=True
+                )
+
+        await self.db.last_checked_block.update_one(
             {"_id": cog_id},
-            {"_id": cog_id, "block": last_checked_block, "operators": num_operators},
+            {"$set": {"block": last_checked_block, "operators": num_operators}},
             upsert=True
         )
 
@@ -73,21 +157,9 @@ class Constellation(Cog):
         """
         await ctx.defer(ephemeral=is_hidden_weak(ctx))
 
-        supernode_contract = rp.get_contract_by_name("Constellation.SuperNodeAccount")
-        distributor_contract = rp.get_contract_by_name("Constellation.OperatorDistributor")
-        info_calls: dict[str, int] = {
-            res.function_name: res.results[0] for res in rp.multicall.aggregate([
-                supernode_contract.functions.getNumMinipools(),
-                supernode_contract.functions.getEthStaked(),
-                supernode_contract.functions.getEthMatched(),
-                supernode_contract.functions.getRplStaked(),
-                supernode_contract.functions.bond(),
-                supernode_contract.functions.maxValidators(),
-                distributor_contract.functions.getTvlEth(),
-                distributor_contract.functions.getTvlRpl(),
-                distributor_contract.functions.minimumStakeRatio()
-            ]).results
-        }
+        # blocking RPC reads run in the executor to keep the event loop responsive
+        snapshot = await asyncio.get_running_loop().run_in_executor(None, self._fetch_chain_snapshot)
+        info_calls: dict[str, int] = snapshot["info_calls"]
 
         num_minipools: int = info_calls["getNumMinipools"]
         eth_staked: int = solidity.to_int(info_calls["getEthStaked"])
@@ -96,23 +168,21 @@ class Constellation(Cog):
         eth_bond: int = solidity.to_int(info_calls["bond"])
         max_validators: int = info_calls["maxValidators"]
 
-        # update operator count
-        num_operators: int = await self._fetch_num_operators()
+        # update operator count, reusing the block number the snapshot was taken at
+        num_operators: int = await self._fetch_num_operators(snapshot["block_number"])
 
-        vault_address_eth: str = rp.get_address_by_name("Constellation.ETHVault")
-        vault_balance_eth = rp.call("WETH.balanceOf", vault_address_eth)
-        tvl_eth: float = solidity.to_float(info_calls["getTvlEth"] + vault_balance_eth)
+        vault_address_eth: str = snapshot["vault_address_eth"]
+        tvl_eth: float = solidity.to_float(info_calls["getTvlEth"] + snapshot["vault_balance_eth"])
 
-        vault_address_rpl: str = rp.get_address_by_name("Constellation.RPLVault")
-        vault_balance_rpl = rp.call("rocketTokenRPL.balanceOf", vault_address_rpl)
-        tvl_rpl: float = solidity.to_float(info_calls["getTvlRpl"] + vault_balance_rpl)
+        vault_address_rpl: str = snapshot["vault_address_rpl"]
+        tvl_rpl: float = solidity.to_float(info_calls["getTvlRpl"] + snapshot["vault_balance_rpl"])
 
         min_rpl_stake_ratio: float = solidity.to_float(info_calls["minimumStakeRatio"])
-        rpl_ratio: float = solidity.to_float(rp.call("rocketNetworkPrices.getRPLPrice"))
+        rpl_ratio: float = solidity.to_float(snapshot["rpl_price"])
         rpl_stake_pct: float = 100 * rpl_staked * rpl_ratio / eth_matched
 
-        balance_eth: float = solidity.to_float(w3.eth.getBalance(distributor_contract.address))
-        balance_rpl: float = solidity.to_float(rp.call("rocketTokenRPL.balanceOf", distributor_contract.address))
+        balance_eth: float = solidity.to_float(snapshot["distributor_balance_eth"])
+        balance_rpl: float = solidity.to_float(snapshot["distributor_balance_rpl"])
 
         # number of new minipools that can be created with available liquidity
         if min_rpl_stake_ratio > 0:
@@ -127,7 +197,7 @@ class Constellation(Cog):
         # break-even time for new minipools
         solo_apr: float = 0.033
         deployment_gas: int = 2_250_000
-        gas_price_wei: int = w3.eth.gas_price
+        gas_price_wei: int = snapshot["gas_price"]
         operator_commission: float = (0.1 + 0.04 * min(1.0, rpl_stake_pct / 10)) / 2
         daily_income_wei: int = round((32 - eth_bond) * 1e18 * solo_apr * operator_commission / 365)
         break_even_days: int = round(deployment_gas * gas_price_wei / daily_income_wei)
@@ -135,7 +205,7 @@ class Constellation(Cog):
         embed = Embed(title="Gravita Constellation")
         embed.add_field(
             name="Node Address",
-            value=el_explorer_url(supernode_contract.address, name=" Supernode"),
+            value=el_explorer_url(snapshot["supernode_address"], name=" Supernode"),
             inline=False
         )
         embed.add_field(name="Minipools", value=num_minipools)
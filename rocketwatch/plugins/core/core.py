@@ -12,6 +12,7 @@ from web3.datastructures import MutableAttributeDict as aDict
 from plugins.deposit_pool import deposit_pool
 from plugins.queue import queue
 from plugins.support_utils.support_utils import generate_template_embed
+from utils.apbf import APBF
 from utils.cfg import cfg
 from utils.containers import Response
 from utils.embeds import assemble
@@ -42,6 +43,9 @@ class Core(commands.Cog):
         # gather all currently cogs with the Queued prefix
         self.submodules = None
         self.speed_limit = 5
+        # bounded-memory dedupe of already-handled event ids; false positives
+        # are acceptable as the goal is to deduplicate
+        self.seen_ids = APBF(capacity=8192, fp_rate=1e-4)
 
         if not self.run_loop.is_running():
             self.run_loop.start()
@@ -169,6 +173,9 @@ class Core(commands.Cog):
                 continue
             if result:
                 for entry in result:
+                    if entry.unique_id in self.seen_ids:
+                        continue
+                    self.seen_ids.add(entry.unique_id)
                     if await self.db.event_queue.find_one({"_id": entry.unique_id}):
                         continue
                     await self.db.event_queue.insert_one(entry.to_dict())
@@ -185,11 +192,17 @@ class Core(commands.Cog):
             log.debug("No pending events in event_queue collection.")
             return
 
+        # resolve all target channels up front, fetching uncached ones concurrently
+        target_channels = dict(zip(channels, await asyncio.gather(
+            *(get_or_fetch_channel(self.bot, channel) for channel in channels)
+        )))
+
+        per_channel = []
         for channel in channels:
             events = await self.db.event_queue.find({"channel_id": channel, "processed": False}).sort(
                 [("score", 1)]).to_list(None)
             log.debug(f"{len(events)} Events found for channel {channel}.")
-            target_channel = await get_or_fetch_channel(self.bot, channel)
+            target_channel = target_channels[channel]
 
             if channel == self.channels["default"]:
                 # get the current state message
@@ -199,13 +212,20 @@ class Core(commands.Cog):
                     await msg.delete()
                     await self.db.state_messages.delete_one({"_id": "state"})
 
-            for i, event in enumerate(events):
-                e = Response.get_embed(event)
-                msg = await target_channel.send(embed=e,silent="debug" in event["event_name"])
-                # mark event as processed
-                await self.db.event_queue.update_one({"_id": event["_id"]}, {"$set": {"processed": True, "message_id": msg.id}})
+            per_channel.append((target_channel, events))
+
+        # sends to different channels are independent REST calls, overlap them
+        # while keeping score order within each channel
+        await asyncio.gather(*(self._send_channel_events(tc, evs) for tc, evs in per_channel))
         log.info("Processed all events in event_queue collection.")
 
+    async def _send_channel_events(self, target_channel, events):
+        for event in events:
+            e = Response.get_embed(event)
+            msg = await target_channel.send(embed=e, silent="debug" in event["event_name"])
+            # mark event as processed
+            await self.db.event_queue.update_one({"_id": event["_id"]}, {"$set": {"processed": True, "message_id": msg.id}})
+
     def cog_unload(self):
         self.state = "STOPPED"
         self.run_loop.cancel()
@@ -209,7 +209,7 @@ class QueuedCowOrders(commands.Cog):
             payload.append(Response(
                 embed=embed,
                 topic="cow_orders",
-                block_number=w3.eth.getBlock("latest").number,
+                block_number=w3.eth.get_block_number(),
                 event_name=data["event_name"],
                 unique_id=f"cow_order_found_{order['uid']}"
             ))
@@ -1,11 +1,12 @@
+import asyncio
 import logging
 
 from typing import Literal
 
 from discord.app_commands import describe
 from discord.ext.commands import Cog, Context, hybrid_command
-
 from utils.cfg import cfg
+from utils.db import db
 from utils.embeds import Embed
 from utils.visibility import is_hidden, is_hidden_weak
 from utils.rocketpool import rp
@@ -17,11 +18,87 @@ log.setLevel(cfg["log_level"])
 
 
 class DAOCommand(Cog):
+    # (state, label, footer template, include votes in body)
+    _DAO_SECTIONS = (
+        (DefaultDAO.ProposalState.Pending, "Pending", "Starts <t:{start}:R>, ends <t:{end}:R>", False),
+        (DefaultDAO.ProposalState.Active, "Active", "Ends <t:{end}:R>", True),
+        (DefaultDAO.ProposalState.Succeeded, "Succeeded (Not Yet Executed)", "Expires <t:{expires}:R>", True),
+    )
+    _PDAO_SECTIONS = (
+        (ProtocolDAO.ProposalState.Pending, "Pending", "Starts <t:{start}:R>, ends <t:{end_phase2}:R>", False),
+        (ProtocolDAO.ProposalState.ActivePhase1, "Active (Phase 1)", "Next phase <t:{end_phase1}:R>, voting ends <t:{end_phase2}:R>", True),
+        (ProtocolDAO.ProposalState.ActivePhase2, "Active (Phase 2)", "Ends <t:{end_phase2}:R>", True),
+        (ProtocolDAO.ProposalState.Succeeded, "Succeeded (Not Yet Executed)", "Expires <t:{expires}:R>", True),
+    )
+
     def __init__(self, bot):
         self.bot = bot
+        self.db = db
+
+    async def _get_candidate_ids(self, index_id: str, num_proposals: int) -> list[int]:
+        # ids that could still be in a non-terminal state: previously seen
+        # non-terminal ones plus everything created since the last lookup
+        if index := await self.db.dao_proposal_index.find_one({"_id": index_id}):
+            return index["candidates"] + list(range(index["total"] + 1, num_proposals + 1))
+        # cold cache, scan everything once
+        return list(range(1, num_proposals + 1))
+
+    async def _store_candidate_ids(self, index_id: str, num_proposals: int, candidate_ids: list[int]) -> None:
+        await self.db.dao_proposal_index.update_one(
+            {"_id": index_id},
+            {"$set": {"candidates": candidate_ids, "total": num_proposals}},
+            upsert=True
+        )
 
     @staticmethod
-    def get_dao_votes_embed(dao: DefaultDAO, full: bool) -> Embed:
+    async def _render_proposals(dao, current_proposals: dict, sections: tuple, full: bool) -> str:
+        rows = [
+            (proposal, label, footer, include_votes)
+            for state, label, footer, include_votes in sections
+            for proposal in current_proposals[state]
+        ]
+        # the payload ABI decode in build_proposal_body is CPU-bound, keep it off the event loop
+        bodies = await asyncio.gather(*(
+            asyncio.to_thread(dao.build_proposal_body, proposal, include_payload=full, include_votes=include_votes)
+            for proposal, _, _, include_votes in rows
+        ))
+        return "\n\n".join(
+            f"**Proposal #{proposal['id']}** - {label}\n"
+            f"```{body}```" + footer.format(**proposal)
+            for (proposal, label, footer, _), body in zip(rows, bodies)
+        ) or "No active proposals."
+
+    async def _fetch_proposals_cached(self, dao, proposal_ids: list[int]) -> tuple[list[dict], list[int]]:
+        if not proposal_ids:
+            return [], []
+        # immutable proposal fields are served from Mongo after the first fetch;
+        # only the vote tallies stay live
+        cached: dict[int, dict] = {
+            doc["proposal_id"]: doc["fields"] async for doc in self.db.dao_proposal_cache.find(
+                {"contract_name": dao.contract_name, "proposal_id": {"$in": proposal_ids}}
+            )
+        }
+        hit_ids = [pid for pid in proposal_ids if pid in cached]
+        for proposal_id, votes in zip(hit_ids, await asyncio.to_thread(dao.fetch_proposal_votes, hit_ids)):
+            cached[proposal_id] |= votes
+
+        missing_ids = [pid for pid in proposal_ids if pid not in cached]
+        fetched = dict(zip(missing_ids, await asyncio.to_thread(dao.fetch_proposals, missing_ids)))
+        return [cached.get(pid) or fetched[pid] for pid in proposal_ids], missing_ids
+
+    async def _cache_proposals(self, dao, proposals: list[dict], new_ids: list[int]) -> None:
+        # called after the embed is built so the memoized payload_str is included
+        for proposal in proposals:
+            if proposal["id"] not in new_ids:
+                continue
+            fields = {key: value for key, value in proposal.items() if key not in dao._VOTE_FIELDS}
+            await self.db.dao_proposal_cache.update_one(
+                {"contract_name": dao.contract_name, "proposal_id": proposal["id"]},
+                {"$set": {"fields": fields}},
+                upsert=True
+            )
+
+    async def get_dao_votes_embed(self, dao: DefaultDAO, full: bool) -> Embed:
         current_proposals: dict[DefaultDAO.ProposalState, list[dict]] = {
             dao.ProposalState.Pending: [],
             dao.ProposalState.Active: [],
@@ -29,44 +106,35 @@ class DAOCommand(Cog):
         }
 
         num_proposals = rp.call("rocketDAOProposal.getTotal")
-        for proposal_id in range(1, num_proposals + 1):
-            state = rp.call("rocketDAOProposal.getState", proposal_id)
-            if state not in current_proposals:
-                continue
-
-            if rp.call("rocketDAOProposal.getDAO", proposal_id) != dao.contract_name:
-                continue
-
-            proposal = dao.fetch_proposal(proposal_id)
+        proposal_ids = await self._get_candidate_ids(dao.contract_name, num_proposals)
+        proposal_contract = rp.get_contract_by_name("rocketDAOProposal")
+        # fetch state and DAO of all candidate proposals in a single multicall
+        results = rp.multicall.aggregate(
+            [proposal_contract.functions.getState(proposal_id) for proposal_id in proposal_ids] +
+            [proposal_contract.functions.getDAO(proposal_id) for proposal_id in proposal_ids]
+        ).results if proposal_ids else []
+        states = [res.results[0] for res in results[:len(proposal_ids)]]
+        dao_names = [res.results[0] for res in results[len(proposal_ids):]]
+
+        survivors = [
+            (proposal_id, state) for proposal_id, state, dao_name in zip(proposal_ids, states, dao_names)
+            if (state in current_proposals) and (dao_name == dao.contract_name)
+        ]
+        # proposals in a terminal state can never leave it, drop them from future scans
+        await self._store_candidate_ids(dao.contract_name, num_proposals, [pid for pid, _ in survivors])
+        # fetch metadata for all surviving proposals in a second multicall
+        proposals, new_ids = await self._fetch_proposals_cached(dao, [proposal_id for proposal_id, _ in survivors])
+        for (_, state), proposal in zip(survivors, proposals):
             current_proposals[state].append(proposal)
 
-        return Embed(
+        embed = Embed(
             title=f"{dao.display_name} Proposals",
-            description="\n\n".join(
-                [
-                    (
-                        f"**Proposal #{proposal['id']}** - Pending\n"
-                        f"```{dao.build_proposal_body(proposal, include_payload=full, include_votes=False)}```"
-                        f"Starts <t:{proposal['start']}:R>, ends <t:{proposal['end']}:R>"
-                    ) for proposal in current_proposals[dao.ProposalState.Pending]
-                ] + [
-                    (
-                        f"**Proposal #{proposal['id']}** - Active\n"
-                        f"```{dao.build_proposal_body(proposal, include_payload=full)}```"
-                        f"Ends <t:{proposal['end']}:R>"
-                    ) for proposal in current_proposals[dao.ProposalState.Active]
-                ] + [
-                    (
-                        f"**Proposal #{proposal['id']}** - Succeeded (Not Yet Executed)\n"
-                        f"```{dao.build_proposal_body(proposal, include_payload=full)}```"
-                        f"Expires <t:{proposal['expires']}:R>"
-                    ) for proposal in current_proposals[dao.ProposalState.Succeeded]
-                ]
-            ) or "No active proposals."
+            description=await self._render_proposals(dao, current_proposals, DAOCommand._DAO_SECTIONS, full)
         )
+        await self._cache_proposals(dao, proposals, new_ids)
+        return embed
 
-    @staticmethod
-    def get_pdao_votes_embed(dao: ProtocolDAO, full: bool) -> Embed:
+    async def get_pdao_votes_embed(self, dao: ProtocolDAO, full: bool) -> Embed:
         current_proposals: dict[ProtocolDAO.ProposalState, list[dict]] = {
             dao.ProposalState.Pending: [],
             dao.ProposalState.ActivePhase1: [],
@@ -75,44 +143,30 @@ class DAOCommand(Cog):
         }
 
         num_proposals = rp.call("rocketDAOProtocolProposal.getTotal")
-        for proposal_id in range(1, num_proposals + 1):
-            state = rp.call("rocketDAOProtocolProposal.getState", proposal_id)
-            if state not in current_proposals:
-                continue
-
-            proposal = dao.fetch_proposal(proposal_id)
+        proposal_ids = await self._get_candidate_ids(dao.contract_name, num_proposals)
+        proposal_contract = rp.get_contract_by_name("rocketDAOProtocolProposal")
+        # fetch the state of all candidate proposals in a single multicall
+        results = rp.multicall.aggregate(
+            [proposal_contract.functions.getState(proposal_id) for proposal_id in proposal_ids]
+        ).results if proposal_ids else []
+
+        survivors = [
+            (proposal_id, res.results[0]) for proposal_id, res in zip(proposal_ids, results)
+            if res.results[0] in current_proposals
+        ]
+        # proposals in a terminal state can never leave it, drop them from future scans
+        await self._store_candidate_ids(dao.contract_name, num_proposals, [pid for pid, _ in survivors])
+        # fetch metadata for all surviving proposals in a second multicall
+        proposals, new_ids = await self._fetch_proposals_cached(dao, [proposal_id for proposal_id, _ in survivors])
+        for (_, state), proposal in zip(survivors, proposals):
             current_proposals[state].append(proposal)
 
-        return Embed(
+        embed = Embed(
             title="pDAO Proposals",
-            description="\n\n".join(
-                [
-                    (
-                        f"**Proposal #{proposal['id']}** - Pending\n"
-                        f"```{dao.build_proposal_body(proposal, include_payload=full, include_votes=False)}```"
-                        f"Starts <t:{proposal['start']}:R>, ends <t:{proposal['end_phase2']}:R>"
-                    ) for proposal in current_proposals[dao.ProposalState.Pending]
-                ] + [
-                    (
-                        f"**Proposal #{proposal['id']}** - Active (Phase 1)\n"
-                        f"```{dao.build_proposal_body(proposal, include_payload=full)}```"
-                        f"Next phase <t:{proposal['end_phase1']}:R>, voting ends <t:{proposal['end_phase2']}:R>"
-                    ) for proposal in current_proposals[dao.ProposalState.ActivePhase1]
-                ] + [
-                    (
-                        f"**Proposal #{proposal['id']}** - Active (Phase 2)\n"
-                        f"```{dao.build_proposal_body(proposal, include_payload=full)}```"
-                        f"Ends <t:{proposal['end_phase2']}:R>"
-                    ) for proposal in current_proposals[dao.ProposalState.ActivePhase2]
-                ] + [
-                    (
-                        f"**Proposal #{proposal['id']}** - Succeeded (Not Yet Executed)\n"
-                        f"```{dao.build_proposal_body(proposal, include_payload=full)}```"
-                        f"Expires <t:{proposal['expires']}:R>"
-                    ) for proposal in current_proposals[dao.ProposalState.Succeeded]
-                ]
-            ) or "No active proposals."
+            description=await self._render_proposals(dao, current_proposals, DAOCommand._PDAO_SECTIONS, full)
         )
+        await self._cache_proposals(dao, proposals, new_ids)
+        return embed
 
     @hybrid_command()
     @describe(dao_name="DAO to show votes for")
@@ -130,13 +184,13 @@ class DAOCommand(Cog):
 
         if dao_name == "pDAO":
             dao = ProtocolDAO()
-            embed = self.get_pdao_votes_embed(dao, full)
+            embed = await self.get_pdao_votes_embed(dao, full)
         else:
             dao = DefaultDAO({
                 "oDAO": "rocketDAONodeTrustedProposals",
                 "Security Council": "rocketDAOSecurityProposals"
             }[dao_name])
-            embed = self.get_dao_votes_embed(dao, full)
+            embed = await self.get_dao_votes_embed(dao, full)
 
         await ctx.send(embed=embed)
 
@@ -15,16 +15,15 @@ from colorama import Fore, Style
 from discord import File, Object
 from discord.app_commands import Choice, guilds, describe
 from discord.ext.commands import is_owner, Cog, Bot, hybrid_command, Context
-from motor.motor_asyncio import AsyncIOMotorClient
 from web3.datastructures import MutableAttributeDict as aDict
 
 from utils import solidity
 from utils.cfg import cfg
 from utils.containers import Response
+from utils.db import db
 from utils.embeds import el_explorer_url, Embed
 from utils.get_nearest_block import get_block_by_timestamp
 from utils.get_or_fetch import get_or_fetch_channel
-from utils.readable import prettify_json_string
 from utils.rocketpool import rp
 from utils.shared_w3 import w3
 from utils.visibility import is_hidden, is_hidden_weak, is_hidden_role_controlled
@@ -37,10 +36,13 @@ log.setLevel(cfg["log_level"])
 class Debug(Cog):
     def __init__(self, bot: Bot):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb_uri"]).get_database("rocketwatch")
+        self.db = db
         self.ran = False
         self.contract_files = []
         self.function_list = []
+        # lowercase copies prebuilt for autocomplete matching
+        self._contract_files_lc = []
+        self._function_list_lc = []
 
     # --------- LISTENERS --------- #
 
@@ -50,7 +52,8 @@ class Debug(Cog):
             return
         self.ran = True
         log.info("Checking if plugins have changed!")
-        plugins_hash = dirhash("plugins")
+        # hashing walks the whole directory tree, keep it off the event loop
+        plugins_hash = await asyncio.to_thread(dirhash, "plugins")
         log.debug(f"Plugin folder hash: {plugins_hash}")
         # check if hash in db matches
         db_entry = await self.db.state.find_one({"_id": "plugins_hash"})
@@ -63,20 +66,44 @@ class Debug(Cog):
             await self.db.state.update_one({"_id": "plugins_hash"}, {"$set": {"hash": plugins_hash}}, upsert=True)
             log.info("Commands updated!")
         log.info("Indexing Rocket Pool contracts...")
-        # generate list of all file names with the .sol extension from the rocketpool submodule
-        for path in Path("contracts/rocketpool/contracts/contract").rglob('*.sol'):
-            # append to list but ensure that the first character is lowercase
-            file_name = path.stem
-            contract = file_name[0].lower() + file_name[1:]
-            self.contract_files.append(contract)
-            try:
-                rp.get_contract_by_name(contract)
-            except Exception as e:
-                log.warning(f"Skipping {contract} in function list generation: {e}")
-                continue
-            for function in rp.get_contract_by_name(contract).functions:
-                self.function_list.append(f"{contract}.{function}")
-            await asyncio.sleep(0.1)
+        contracts_hash = await asyncio.to_thread(dirhash, "contracts/rocketpool/contracts/contract")
+        index_entry = await self.db.state.find_one({"_id": "contracts_index"})
+        if index_entry and contracts_hash == index_entry.get("hash"):
+            # contracts unchanged, reuse the index built on a previous boot
+            log.info("Contracts have not changed, loading index from database!")
+            self.contract_files.extend(index_entry["contract_files"])
+            self.function_list.extend(index_entry["function_list"])
+        else:
+            # generate list of all file names with the .sol extension from the rocketpool submodule,
+            # ensuring that the first character is lowercase
+            contract_names = [
+                path.stem[0].lower() + path.stem[1:]
+                for path in Path("contracts/rocketpool/contracts/contract").rglob('*.sol')
+            ]
+            # resolve contracts concurrently, bounded so the RPC endpoint isn't flooded
+            semaphore = asyncio.Semaphore(16)
+
+            async def load_functions(contract: str) -> list[str]:
+                async with semaphore:
+                    try:
+                        contract_obj = await asyncio.to_thread(rp.get_contract_by_name, contract)
+                    except Exception as e:
+                        log.warning(f"Skipping {contract} in function list generation: {e}")
+                        return []
+                return [f"{contract}.{function}" for function in contract_obj.functions]
+
+            self.contract_files.extend(contract_names)
+            for functions in await asyncio.gather(*map(load_functions, contract_names)):
+                self.function_list.extend(functions)
+            await self.db.state.update_one(
+                {"_id": "contracts_index"},
+                {"$set": {
+                    "hash"          : contracts_hash,
+                    "contract_files": self.contract_files.copy(),
+                    "function_list" : self.function_list.copy()
+                }},
+                upsert=True
+            )
 
         self.contract_files.extend(list(cfg["rocketpool.manual_addresses"].keys()))
         # enable calls to non-RocketStorage contracts
@@ -85,6 +112,10 @@ class Debug(Cog):
             for function in contract.functions:
                 self.function_list.append(f"{manual_name}.{function}")
 
+        # lowercase once here instead of per autocomplete keystroke
+        self._contract_files_lc = [(name.lower(), name) for name in self.contract_files]
+        self._function_list_lc = [(name.lower(), name) for name in self.function_list]
+
         log.info("Done!")
 
     # --------- PRIVATE OWNER COMMANDS --------- #
@@ -158,11 +189,11 @@ class Debug(Cog):
         Decode transaction calldata
         """
         await ctx.defer(ephemeral=True)
-        tnx = w3.eth.get_transaction(tnx_hash)
+        tnx = await asyncio.to_thread(w3.eth.get_transaction, tnx_hash)
         if contract_name:
-            contract = rp.get_contract_by_name(contract_name)
+            contract = await asyncio.to_thread(rp.get_contract_by_name, contract_name)
         else:
-            contract = rp.get_contract_by_address(tnx.to)
+            contract = await asyncio.to_thread(rp.get_contract_by_address, tnx.to)
         data = contract.decode_function_input(tnx.input)
         await ctx.send(content=f"```Input:\n{data}```")
 
@@ -174,8 +205,8 @@ class Debug(Cog):
         Try to return the revert reason of a transaction.
         """
         await ctx.defer(ephemeral=True)
-        transaction_receipt = w3.eth.getTransaction(tnx_hash)
-        if revert_reason := rp.get_revert_reason(transaction_receipt):
+        transaction_receipt = await asyncio.to_thread(w3.eth.getTransaction, tnx_hash)
+        if revert_reason := await asyncio.to_thread(rp.get_revert_reason, transaction_receipt):
             await ctx.send(content=f"```Revert reason: {revert_reason}```")
         else:
             await ctx.send(content="```No revert reason Available```")
@@ -468,8 +499,8 @@ class Debug(Cog):
         Get a block using a timestamp. Useful for contracts that track blocktime instead of blocknumber.
         """
         await ctx.defer(ephemeral=is_hidden(ctx))
-        block, steps = get_block_by_timestamp(timestamp)
-        found_timestamp = w3.eth.get_block(block).timestamp
+        block, steps = await asyncio.to_thread(get_block_by_timestamp, timestamp)
+        found_timestamp = (await asyncio.to_thread(w3.eth.get_block, block)).timestamp
         if found_timestamp == timestamp:
             text = f"```Found perfect match for timestamp: {timestamp}\n" \
                    f"Block: {block}\n" \
@@ -486,9 +517,16 @@ class Debug(Cog):
         """retrieve the latest ABI for a contract"""
         await ctx.defer(ephemeral=is_hidden_role_controlled(ctx))
         try:
-            with io.StringIO(prettify_json_string(rp.uncached_get_abi_by_name(contract))) as f:
+            abi = json.loads(await asyncio.to_thread(rp.uncached_get_abi_by_name, contract))
+            with io.BytesIO() as buffer:
+                # stream the pretty-printed json straight into the upload buffer
+                # instead of materializing it as an intermediate string
+                wrapper = io.TextIOWrapper(buffer, encoding="utf-8", write_through=True)
+                json.dump(abi, wrapper, indent=4)
+                wrapper.flush()
+                buffer.seek(0)
                 await ctx.send(
-                    files=[File(fp=f, filename=f"{contract}.{cfg['rocketpool.chain']}.abi.json")])
+                    files=[File(fp=buffer, filename=f"{contract}.{cfg['rocketpool.chain']}.abi.json")])
         except Exception as err:
             await ctx.send(content=f"```Exception: {repr(err)}```")
 
@@ -529,12 +567,14 @@ class Debug(Cog):
             args = json.loads(json_args)
             if not isinstance(args, list):
                 args = [args]
-            v = rp.call(function, *args, block=block, address=w3.toChecksumAddress(address) if address else None)
+            v = await asyncio.to_thread(
+                rp.call, function, *args, block=block, address=w3.toChecksumAddress(address) if address else None
+            )
         except Exception as err:
             await ctx.send(content=f"Exception: ```{repr(err)}```")
             return
         try:
-            g = rp.estimate_gas_for_call(function, *args, block=block)
+            g = await asyncio.to_thread(rp.estimate_gas_for_call, function, *args, block=block)
         except Exception as err:
             g = "N/A"
             if isinstance(err, ValueError) and err.args and "code" in err.args and err.args[0]["code"] == -32000:
@@ -607,15 +647,27 @@ class Debug(Cog):
 
     # --------- OTHERS --------- #
 
+    @staticmethod
+    def _match_choices(index: list[tuple[str, str]], current: str) -> list[Choice]:
+        query = current.lower()
+        choices = []
+        for name_lc, name in index:
+            if query in name_lc:
+                choices.append(Choice(name=name, value=name))
+                # Discord caps autocomplete at 25 choices, stop scanning early
+                if len(choices) == 25:
+                    break
+        return choices
+
     @get_address_of_contract.autocomplete("contract")
     @get_abi_of_contract.autocomplete("contract")
     @decode_tnx.autocomplete("contract_name")
     async def match_contract_names(self, ctx: Context, current: str):
-        return [Choice(name=name, value=name) for name in self.contract_files if current.lower() in name.lower()][:25]
+        return self._match_choices(self._contract_files_lc, current)
 
     @call.autocomplete("function")
     async def match_function_name(self, ctx: Context, current: str):
-        return [Choice(name=name, value=name) for name in self.function_list if current.lower() in name.lower()][:25]
+        return self._match_choices(self._function_list_lc, current)
 
 
 async def setup(bot):
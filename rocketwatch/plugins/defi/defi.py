@@ -1,11 +1,12 @@
+import asyncio
 import logging
 
 import aiohttp
+from cachetools import TTLCache
 from discord import AllowedMentions
 from discord.ext import commands
 from discord.ext.commands import Context
 from discord.ext.commands import hybrid_command
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from utils import solidity
 from utils.cfg import cfg
@@ -19,9 +20,38 @@ log.setLevel(cfg["log_level"])
 
 
 class DeFi(commands.Cog):
+    # curve reserves only move with blocks, share them between /curve and /yearn
+    _curve_balances_cache = TTLCache(maxsize=1, ttl=12)
+
     def __init__(self, bot):
         self.bot = bot
 
+    async def _get_curve_balances(self) -> tuple[int, int, float, float]:
+        # raw token balances of the curve pool and their ETH values
+        if not (balances := self._curve_balances_cache.get("balances")):
+            loop = asyncio.get_running_loop()
+            reth_r, wsteth_r = await loop.run_in_executor(None, rp.call, "curvePool.get_balances")
+            # token values (depend on the balances fetched above)
+            reth_v_r, wsteth_v_r = await asyncio.gather(
+                loop.run_in_executor(None, rp.call, "rocketTokenRETH.getEthValue", reth_r),
+                loop.run_in_executor(None, rp.call, "wstETHToken.getStETHByWstETH", wsteth_r),
+            )
+            balances = (reth_r, wsteth_r, solidity.to_float(reth_v_r), solidity.to_float(wsteth_v_r))
+            self._curve_balances_cache["balances"] = balances
+        return balances
+
+    @staticmethod
+    def _exchange_rate_reth_to_wsteth() -> float:
+        # rETH => wstETH premium
+        eth_to_wsteth = rp.call("curvePool.get_dy", 0, 1, rp.call("rocketTokenRETH.getRethValue", w3.toWei(1, "ether")))
+        return solidity.to_float(rp.call("wstETHToken.getStETHByWstETH", eth_to_wsteth))
+
+    @staticmethod
+    def _exchange_rate_wsteth_to_reth() -> float:
+        # wstETH => rETH premium
+        eth_to_reth = rp.call("curvePool.get_dy", 1, 0, rp.call("wstETHToken.getWstETHByStETH", w3.toWei(1, "ether")))
+        return solidity.to_float(rp.call("rocketTokenRETH.getEthValue", eth_to_reth))
+
     @hybrid_command()
     async def curve(self, ctx: Context):
         """
@@ -30,13 +60,18 @@ class DeFi(commands.Cog):
         await ctx.defer(ephemeral=is_hidden_weak(ctx))
         e = Embed()
         e.title = "Curve Pool"
-        reth_r, wsteth_r = rp.call("curvePool.get_balances")
+        loop = asyncio.get_running_loop()
+        # fan out the independent call chains instead of serializing round-trips
+        (reth_r, wsteth_r, reth_v, wsteth_v), token_name, dai_eth_price, reth_to_wsteth, wsteth_to_reth = await asyncio.gather(
+            self._get_curve_balances(),
+            loop.run_in_executor(None, rp.call, "curvePool.symbol"),
+            loop.run_in_executor(None, rp.get_dai_eth_price),
+            loop.run_in_executor(None, self._exchange_rate_reth_to_wsteth),
+            loop.run_in_executor(None, self._exchange_rate_wsteth_to_reth),
+        )
         # token amounts
         reth = solidity.to_float(reth_r)
         wsteth = solidity.to_float(wsteth_r)
-        # token values
-        reth_v = solidity.to_float(rp.call("rocketTokenRETH.getEthValue", reth_r))
-        wsteth_v = solidity.to_float(rp.call("wstETHToken.getStETHByWstETH", wsteth_r))
         # token shares
         reth_s = reth / (reth + wsteth)
         wsteth_s = wsteth / (reth + wsteth)
@@ -49,31 +84,26 @@ class DeFi(commands.Cog):
             value=f"`{wsteth:,.2f} wstETH ({wsteth_s:.0%})`",
         )
         total_locked = reth_v + wsteth_v
-        total_locked_usd = total_locked * rp.get_dai_eth_price()
+        total_locked_usd = total_locked * dai_eth_price
         e.add_field(
             name="Total Value Locked",
             value=f"`{total_locked:,.2f} ETH ({total_locked_usd:,.2f} DAI)`",
             inline=False,
         )
-        # rETH => wstETH premium
-        eth_to_wsteth = rp.call("curvePool.get_dy", 0, 1, rp.call("rocketTokenRETH.getRethValue", w3.toWei(1, "ether")))
         e.add_field(
             name="Current rETH => wstETH Exchange (Assuming true-lsd value)",
             value=f"`1 ETH worth of rETH will get you "
-                  f"{solidity.to_float(rp.call('wstETHToken.getStETHByWstETH',eth_to_wsteth)):,.4f} ETH "
+                  f"{reth_to_wsteth:,.4f} ETH "
                   f"worth of wstETH`",
             inline=False,
         )
-        # wstETH => rETH premium
-        eth_to_reth = rp.call("curvePool.get_dy", 1, 0, rp.call("wstETHToken.getWstETHByStETH", w3.toWei(1, "ether")))
         e.add_field(
             name="Current wstETH => rETH Exchange (Assuming true-lsd value)",
             value=f"`1 ETH worth of wstETH will get you "
-                  f"{solidity.to_float(rp.call('rocketTokenRETH.getEthValue',eth_to_reth)):,.4f} ETH"
+                  f"{wsteth_to_reth:,.4f} ETH"
                   f" worth of rETH`",
             inline=False,
         )
-        token_name = rp.call("curvePool.symbol")
         link = el_explorer_url(rp.get_address_by_name("curvePool"), token_name)
         e.add_field(
             name="Contract Address",
@@ -89,25 +119,33 @@ class DeFi(commands.Cog):
         await ctx.defer(ephemeral=is_hidden_weak(ctx))
         e = Embed()
         e.title = "Yearn Pool"
-        deposit_limit = solidity.to_float(rp.call("yearnPool.depositLimit"))
-        deposited = solidity.to_float(rp.call("yearnPool.totalAssets"))
-        asset_name = rp.call("curvePool.symbol")
+        loop = asyncio.get_running_loop()
+        # fan out the independent calls instead of serializing round-trips
+        (
+            deposit_limit_r, total_assets, asset_name, token_name,
+            (_, _, reth_v, wsteth_v), total_supply, dai_eth_price
+        ) = await asyncio.gather(
+            loop.run_in_executor(None, rp.call, "yearnPool.depositLimit"),
+            loop.run_in_executor(None, rp.call, "yearnPool.totalAssets"),
+            loop.run_in_executor(None, rp.call, "curvePool.symbol"),
+            loop.run_in_executor(None, rp.call, "yearnPool.symbol"),
+            self._get_curve_balances(),
+            loop.run_in_executor(None, rp.call, "curvePool.totalSupply"),
+            loop.run_in_executor(None, rp.get_dai_eth_price),
+        )
+        deposit_limit = solidity.to_float(deposit_limit_r)
+        deposited = solidity.to_float(total_assets)
         e.add_field(
             name="Deposit Limit Status",
             value=f"`{deposited:,.2f}/{deposit_limit:,.2f} {asset_name}`",
         )
-        reth_r, wsteth_r = rp.call("curvePool.get_balances")
-        # token values
-        reth_v = solidity.to_float(rp.call("rocketTokenRETH.getEthValue", reth_r))
-        wsteth_v = solidity.to_float(rp.call("wstETHToken.getStETHByWstETH", wsteth_r))
-        yearn_locked = (reth_v + wsteth_v) * (rp.call("yearnPool.totalAssets") / rp.call("curvePool.totalSupply"))
-        yearn_locked_usd = yearn_locked * rp.get_dai_eth_price()
+        yearn_locked = (reth_v + wsteth_v) * (total_assets / total_supply)
+        yearn_locked_usd = yearn_locked * dai_eth_price
         e.add_field(
             name="Total Value Locked",
             value=f"`{yearn_locked:,.2f} ETH ({yearn_locked_usd:,.2f} DAI)`",
             inline=False,
         )
-        token_name = rp.call("yearnPool.symbol")
         link = el_explorer_url(rp.get_address_by_name("yearnPool"), token_name)
         e.add_field(
             name="Contract Address",
@@ -92,7 +92,8 @@ class DepositPool(commands.Cog):
         current_collateral_in_eth = current_reth_value * current_collateral_rate
         collateral_rate_target = solidity.to_float(rp.call("rocketDAOProtocolSettingsNetwork.getTargetRethCollateralRate"))
         collateral_target_in_eth = current_reth_value * collateral_rate_target
-        collateral_used = current_collateral_in_eth / collateral_target_in_eth
+        # the target rate can be zeroed by a pdao setting change; don't let that kill the embed
+        collateral_used = current_collateral_in_eth / collateral_target_in_eth if collateral_target_in_eth else 0
 
         e = Embed()
         e.title = "rETH Extra Collateral"
@@ -143,9 +144,10 @@ class DepositPool(commands.Cog):
             }
         ]).to_list(None)
 
-        total = int(data[0]['value'])
-        count = data[0]['count']
-        count_16 = int(data[0]['count_16'])
+        # the aggregation returns no documents at all when the queue is empty
+        total = int(data[0]['value']) if data else 0
+        count = data[0]['count'] if data else 0
+        count_16 = int(data[0]['count_16']) if data else 0
         count_8 = count - count_16
 
         e.description = f"Amount deposited into Deposit Pool by Queued Minipools: **{total} ETH**\n" \
@@ -1,8 +1,14 @@
 import json
 import logging
+import os
+import struct
+import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from hashlib import blake2b
 
+import orjson
 import pymongo
 from typing import Union, Optional
 from discord import Object
@@ -24,9 +30,23 @@ from utils.dao import DefaultDAO, ProtocolDAO
 log = logging.getLogger("events")
 log.setLevel(cfg["log_level"])
 
+# processReceipt warns about every receipt log that doesn't match the event
+# abi; filter the message once here instead of toggling the (global, locked)
+# warning state around every call
+warnings.filterwarnings("ignore", message=r"The log with transaction hash: .*", category=UserWarning)
+
 
 class QueuedEvents(Cog):
     update_block = 0
+    # parsed events.json; the file never changes at runtime, so it is read once
+    # per process instead of once per (re)init
+    _events_config = None
+    # level-1 dedupe over raw logs, consulted before any ABI decoding.
+    # class-level so it survives the reinit triggered by look-back replays;
+    # the salt keeps fingerprints short and is rotated to age out stale entries
+    _raw_salt = os.urandom(16)
+    _raw_salt_time = time.time()
+    _raw_fingerprints: set[bytes] = set()
 
     class State(Enum):
         INIT = 0
@@ -37,33 +57,39 @@ class QueuedEvents(Cog):
         rp.flush()
         self.bot = bot
         self.state = self.State.INIT
-        self.events = []
-        self.internal_event_mapping = {}
-        self.topic_mapping = {}
+        self._receipts = {}
+        self._update_detected = False
+        # exponential backoff between recovery attempts after a failed run
+        self._retry_delay = 0
+        self._next_retry = 0
         self.mongo = pymongo.MongoClient(cfg["mongodb_uri"])
         self.db = self.mongo.rocketwatch
-
-        with open("./plugins/events/events.json") as f:
-            events_config = json.load(f)
-
-        try:
-            latest_block = self.db.last_checked_block.find_one({"_id": "events"})["block"]
-            self.start_block = latest_block - cfg["core.look_back_distance"]
-        except Exception as err:
-            log.error(f"Failed to get latest block from db: {err}")
-            self.start_block = w3.eth.getBlock("latest").number - cfg["core.look_back_distance"]
-
-        # Generate Filter for direct Events
-        addresses = []
-        aggregated_topics = []
-        for group in events_config["direct"]:
+        self._load_event_map()
+        self._subscribe_filters()
+
+    @classmethod
+    def _load_events_config(cls) -> dict:
+        if cls._events_config is None:
+            with open("./plugins/events/events.json", "rb") as f:
+                cls._events_config = orjson.loads(f.read())
+        return cls._events_config
+
+    def _load_event_map(self):
+        # (address, topic) -> (contract, contract_name, abi event name, internal event name, bound decoder)
+        # so the per-log hot path is a single dict lookup. only needs rebuilding
+        # when contract addresses change, i.e. after a protocol upgrade
+        self.internal_event_mapping = {}
+        self._log_lookup = {}
+        self._direct_addresses = []
+        self._direct_topics = []
+        for group in self._load_events_config()["direct"]:
             contract_name = group["contract_name"]
             try:
                 contract = rp.get_contract_by_name(contract_name)
             except NoAddressFound as err:
                 log.error(f"Failed to get contract {contract_name}: {err}")
                 continue
-            addresses.append(contract.address)
+            self._direct_addresses.append(contract.address)
 
             for event in group["events"]:
                 event_name = event["event_name"]
@@ -75,20 +101,37 @@ class QueuedEvents(Cog):
                     continue
 
                 self.internal_event_mapping[f"{contract_name}.{event_name}"] = event["name"]
-                self.topic_mapping[topic] = event_name
-                if topic not in aggregated_topics:
-                    aggregated_topics.append(topic)
+                # the bound ContractEvent instance is cached too, so the hot
+                # loop doesn't rebuild one per processed log
+                self._log_lookup[(contract.address, topic)] = (
+                    contract, contract_name, event_name, event["name"], contract.events[event_name]()
+                )
+                if topic not in self._direct_topics:
+                    self._direct_topics.append(topic)
 
-        if addresses:
+    def _subscribe_filters(self):
+        # (re)create the node-side log filters. these are what go stale when a
+        # run is interrupted, the decoded event map can be kept as-is
+        self.events = []
+
+        try:
+            latest_block = self.db.last_checked_block.find_one({"_id": "events"})["block"]
+            self.start_block = latest_block - cfg["core.look_back_distance"]
+        except Exception as err:
+            log.error(f"Failed to get latest block from db: {err}")
+            self.start_block = w3.eth.get_block_number() - cfg["core.look_back_distance"]
+
+        # Generate Filter for direct Events
+        if self._direct_addresses:
             self.events.append(w3.eth.filter({
-                "address"  : addresses,
-                "topics"   : [aggregated_topics],
+                "address"  : self._direct_addresses,
+                "topics"   : [self._direct_topics],
                 "fromBlock": self.start_block,
                 "toBlock"  : "latest"
             }))
 
         # Generate Filters for global Events
-        for group in events_config["global"]:
+        for group in self._load_events_config()["global"]:
             contract = rp.assemble_contract(name=group["contract_name"])
             for event in group["events"]:
                 try:
@@ -151,14 +194,11 @@ class QueuedEvents(Cog):
 
         # get direct events
         for event_log in logs:
-            if ("topics" in event_log) and (event_log["topics"][0].hex() in self.topic_mapping):
+            if ("topics" in event_log) and ((event_log["address"], event_log["topics"][0].hex()) in self._log_lookup):
                 filtered_events.append(event_log)
 
         # get global events
-        with open("./plugins/events/events.json") as f:
-            global_events = json.load(f)["global"]
-
-        for group in global_events:
+        for group in self._load_events_config()["global"]:
             contract = rp.assemble_contract(name=group["contract_name"])
             for event in group["events"]:
                 try:
@@ -175,10 +215,43 @@ class QueuedEvents(Cog):
         for response in responses:
             await ctx.send(embed=response.embed)
 
+    def _raw_fingerprint(self, event: Union[LogReceipt, EventData]) -> bytes:
+        h = blake2b(digest_size=16, key=self._raw_salt)
+        h.update(bytes(event["transactionHash"]))
+        h.update(bytes(event["blockHash"]))
+        if topics := event.get("topics"):
+            h.update(bytes(topics[0]))
+        h.update(struct.pack("<I", event["logIndex"]))
+        return h.digest()
+
+    def _prefetch_receipts(self, events: list[Union[LogReceipt, EventData]]) -> None:
+        # fetch every receipt the handlers might need up front and in parallel
+        # instead of issuing one blocking eth_getTransactionReceipt per event
+        tx_hashes = list({event["transactionHash"].hex() for event in events})
+        if not tx_hashes:
+            self._receipts = {}
+            return
+        with ThreadPoolExecutor(max_workers=min(8, len(tx_hashes))) as executor:
+            self._receipts = dict(zip(tx_hashes, executor.map(w3.eth.get_transaction_receipt, tx_hashes)))
+
+    def _get_receipt(self, tx_hash: str):
+        if (receipt := self._receipts.get(tx_hash)) is None:
+            receipt = w3.eth.get_transaction_receipt(tx_hash)
+        return receipt
+
     def handle_global_event(self, event_name, event) -> Optional[Response]:
-        receipt = w3.eth.get_transaction_receipt(event.transactionHash)
-        if not any([rp.call("rocketMinipoolManager.getMinipoolExists", receipt.to),
-                    rp.call("rocketMinipoolManager.getMinipoolExists", event.address),
+        receipt = self._get_receipt(event.transactionHash.hex())
+        minipool_manager = rp.get_contract_by_name("rocketMinipoolManager")
+        # single batched eth_call instead of three sequential round trips
+        to_is_minipool, address_is_minipool, minipool_pubkey = [
+            res.results[0] for res in rp.multicall.aggregate([
+                minipool_manager.functions.getMinipoolExists(receipt.to),
+                minipool_manager.functions.getMinipoolExists(event.address),
+                minipool_manager.functions.getMinipoolPubkey(event.address),
+            ]).results
+        ]
+        if not any([to_is_minipool,
+                    address_is_minipool,
                     rp.get_name_by_address(receipt.to),
                     rp.get_name_by_address(event.address)]):
             # some random contract we don't care about
@@ -198,7 +271,7 @@ class QueuedEvents(Cog):
 
         # maybe the contract has it stored?
         if not pubkey:
-            pubkey = rp.call("rocketMinipoolManager.getMinipoolPubkey", event.address).hex()
+            pubkey = minipool_pubkey.hex()
 
         # maybe it's in the transaction?
         if not pubkey:
@@ -223,8 +296,7 @@ class QueuedEvents(Cog):
         return self.handle_event(event_name, event)
 
 
-    @staticmethod
-    def handle_event(event_name, event) -> Optional[Response]:
+    def handle_event(self, event_name, event) -> Optional[Response]:
         args = aDict(event['args'])
 
         if "negative_rETH_ratio_update_event" in event_name:
@@ -304,7 +376,7 @@ class QueuedEvents(Cog):
             elif args.newLimit < args.oldLimit:
                 event_name = event_name.replace("change", "decrease")
         elif event_name == "cs_operator_added_event":
-            args.address = w3.eth.get_transaction_receipt(event.transactionHash)["from"]
+            args.address = self._get_receipt(event.transactionHash.hex())["from"]
         elif event_name == "cs_rpl_treasury_fee_change_event":
             args.oldFee = 100 * solidity.to_float(args.oldFee)
             args.newFee = 100 * solidity.to_float(args.newFee)
@@ -358,7 +430,7 @@ class QueuedEvents(Cog):
 
         receipt = None
         if "tnx_fee" not in args and cfg["rocketpool.chain"] == "mainnet":
-            receipt = w3.eth.get_transaction_receipt(event.transactionHash)
+            receipt = self._get_receipt(event.transactionHash.hex())
             args.tnx_fee = solidity.to_float(receipt["gasUsed"] * receipt["effectiveGasPrice"])
             args.tnx_fee_dai = rp.get_dai_eth_price() * args.tnx_fee
             args.caller = receipt["from"]
@@ -523,12 +595,10 @@ class QueuedEvents(Cog):
             # get the transaction receipt
             args.depositAmount = rp.call("rocketMinipool.getNodeDepositBalance", address=args.minipool, block=args.blockNumber)
             user_deposit = args.depositAmount
-            receipt = w3.eth.get_transaction_receipt(args.transactionHash)
+            receipt = self._get_receipt(args.transactionHash)
             args.node = receipt["from"]
             ee = rp.get_contract_by_name("rocketNodeDeposit").events.DepositReceived()
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                processed_logs = ee.processReceipt(receipt)
+            processed_logs = ee.processReceipt(receipt)
             for deposit_event in processed_logs:
                 # needs to be within 5 before the event
                 if event.logIndex - 6 < deposit_event.logIndex < event.logIndex:
@@ -537,9 +607,7 @@ class QueuedEvents(Cog):
                 args.creditAmount = args.depositAmount - user_deposit
                 args.balanceAmount = 0
                 e = rp.get_contract_by_name("rocketVault").events.EtherWithdrawn()
-                with warnings.catch_warnings():
-                    warnings.simplefilter("ignore")
-                    processed_logs = e.processReceipt(receipt)
+                processed_logs = e.processReceipt(receipt)
 
                 deposit_contract = bytes(w3.soliditySha3(["string"], ["rocketNodeDeposit"]))
                 for withdraw_event in processed_logs:
@@ -640,9 +708,25 @@ class QueuedEvents(Cog):
 
     def run_loop(self):
         if self.state == self.State.RUNNING:
-            log.error("Bootstrap plugin was interrupted while running. Reinitializing...")
-            self.__init__(self.bot)
-        return self.check_for_new_events()
+            if (now := time.time()) < self._next_retry:
+                log.debug("Backing off before recovering event filters")
+                return []
+            self._retry_delay = min(max(2 * self._retry_delay, 1), 60)
+            self._next_retry = now + self._retry_delay
+            if self._update_detected:
+                # contract upgrade: addresses and ABIs changed, rebuild everything
+                log.info("Contract update detected. Reinitializing...")
+                self.__init__(self.bot)
+            else:
+                # interrupted mid-run: the decoded event map is still valid,
+                # only the node-side filters need to be recreated
+                log.error("Plugin was interrupted while running. Resubscribing filters...")
+                self._subscribe_filters()
+                self.state = self.State.INIT
+        messages = self.check_for_new_events()
+        self._retry_delay = 0
+        self._next_retry = 0
+        return messages
 
     def aggregate_events(self, events: list[Union[LogReceipt, EventData]]) -> list[aDict]:
         # aggregate and deduplicate events within the same transaction
@@ -661,8 +745,7 @@ class QueuedEvents(Cog):
 
         def get_event_name(_event: Union[LogReceipt, EventData]) -> tuple[str, str]:
             if "topics" in _event:
-                contract_name = rp.get_name_by_address(_event["address"])
-                name = self.topic_mapping[_event["topics"][0].hex()]
+                _, contract_name, name, _, _ = self._log_lookup[(_event["address"], _event["topics"][0].hex())]
             else:
                 contract_name = None
                 name = _event.get("event")
@@ -683,8 +766,8 @@ class QueuedEvents(Cog):
                     events_by_name[full_event_name] = []
 
                 if full_event_name == "unstETH.WithdrawalRequested":
-                    contract = rp.get_contract_by_address(event["address"])
-                    _event = aDict(contract.events[event_name]().processLog(event))
+                    decoder = self._log_lookup[(event["address"], event["topics"][0].hex())][4]
+                    _event = aDict(decoder.processLog(event))
                     # sum up the amount of stETH withdrawn in this transaction
                     if amount := tx_aggregates.get(full_event_name, 0):
                         events.remove(event)
@@ -694,9 +777,9 @@ class QueuedEvents(Cog):
                         events.remove(event)
                         continue
                     if prev_event := tx_aggregates.get(full_event_name, None):
-                        contract = rp.get_contract_by_address(event["address"])
-                        _event = aDict(contract.events[event_name]().processLog(event))
-                        _prev_event = aDict(contract.events[event_name]().processLog(event))
+                        decoder = self._log_lookup[(event["address"], event["topics"][0].hex())][4]
+                        _event = aDict(decoder.processLog(event))
+                        _prev_event = aDict(decoder.processLog(event))
                         if _prev_event["args"]["value"] > _event["args"]["value"]:
                             events.remove(event)
                             event = prev_event
@@ -753,9 +836,23 @@ class QueuedEvents(Cog):
                 pending_events += events.get_all_entries()
             else:
                 pending_events += events.get_new_entries()
-        log.debug(f"Found {len(pending_events)} pending events")
 
-        should_reinit, messages = self.process_events(pending_events)
+        # rotate the fingerprint salt so stale entries age out of the set
+        if (now := time.time()) - QueuedEvents._raw_salt_time > 600:
+            QueuedEvents._raw_salt = os.urandom(16)
+            QueuedEvents._raw_salt_time = now
+            self._raw_fingerprints.clear()
+
+        # drop logs replayed by the look-back window before spending any time
+        # decoding them; the unique id dedupe downstream stays the exact tier
+        fresh_events = []
+        for event in pending_events:
+            if (fp := self._raw_fingerprint(event)) not in self._raw_fingerprints:
+                self._raw_fingerprints.add(fp)
+                fresh_events.append(event)
+        log.debug(f"Found {len(fresh_events)} pending events")
+
+        should_reinit, messages = self.process_events(fresh_events)
         log.debug("Finished checking for new events")
         # store last checked block in db if it's bigger than the one we have stored
         self.state = self.State.OK
@@ -766,6 +863,7 @@ class QueuedEvents(Cog):
         )
         if should_reinit:
             log.info("Detected update, triggering reinit")
+            self._update_detected = True
             self.state = self.State.RUNNING
         return messages
 
@@ -777,6 +875,7 @@ class QueuedEvents(Cog):
         log.debug(f"Aggregating {len(events)} events")
         events = self.aggregate_events(events)
         log.debug(f"Processing {len(events)} events")
+        self._prefetch_receipts(events)
 
         for event in events:
             if event.get("removed", False):
@@ -785,13 +884,13 @@ class QueuedEvents(Cog):
             log.debug(f"Checking event {event}")
 
             response = None
-            if (n := rp.get_name_by_address(event.address)) and "topics" in event:
-                log.info(f"Found event {event} for {n}")
+            lookup = self._log_lookup.get((event.address, event.topics[0].hex())) if "topics" in event else None
+            if lookup is not None:
+                _, contract_name, _, event_name, decoder = lookup
+                log.info(f"Found event {event} for {contract_name}")
                 # default event path
-                contract = rp.get_contract_by_address(event.address)
-                contract_event = self.topic_mapping[event.topics[0].hex()]
                 topics = [w3.toHex(t) for t in event.topics]
-                _event = aDict(contract.events[contract_event]().processLog(event))
+                _event = aDict(decoder.processLog(event))
                 _event.topics = topics
                 if "assignment_count" in event:
                     _event.assignment_count = event.assignment_count
@@ -800,10 +899,7 @@ class QueuedEvents(Cog):
                     _event.args.amountOfStETH = event.amountOfStETH
                 event = _event
 
-                if event_name := self.internal_event_mapping.get(f"{n}.{event.event}"):
-                    response = self.handle_event(event_name, event)
-                else:
-                    log.warning(f"Skipping unknown event {n}.{event.event}")
+                response = self.handle_event(event_name, event)
 
             elif event.get("event") in self.internal_event_mapping:
                 event_name = self.internal_event_mapping[event.event]
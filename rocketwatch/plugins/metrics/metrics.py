@@ -1,11 +1,11 @@
+import asyncio
 import logging
-import math
 from datetime import datetime, timedelta
 from io import BytesIO
 
 import motor.motor_asyncio
 from bson import SON
-from cachetools import TTLCache
+from pymongo import IndexModel
 from discord import NotFound, File, Interaction, app_commands
 from discord.ext import commands
 from discord.ext.commands import Context
@@ -16,6 +16,7 @@ from utils import reporter
 from utils.cfg import cfg
 from utils.embeds import Embed
 from utils.reporter import report_error
+from utils.s3fifo import S3FIFO
 from utils.visibility import is_hidden
 
 log = logging.getLogger("metrics")
@@ -25,7 +26,8 @@ log.setLevel(cfg["log_level"])
 class Metrics(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.notice_ttl_cache = TTLCache(math.inf, ttl=60 * 15)
+        # bounded, so a long tail of one-off users can't grow it between TTL sweeps
+        self.notice_ttl_cache = S3FIFO(capacity=4096, ttl=60 * 15)
         self.mongo = motor.motor_asyncio.AsyncIOMotorClient(cfg["mongodb_uri"])
         self.db = self.mongo.rocketwatch
         self.collection = self.db.command_metrics
@@ -44,49 +46,44 @@ class Metrics(commands.Cog):
             # last 7 days
             start = datetime.utcnow() - timedelta(days=7)
 
-            # get the total number of processed events from the event_queue in the last 7 days
-            total_events_processed = await self.db.event_queue.count_documents({'time_seen': {'$gte': start}})
+            # one $match + $facet pipeline instead of five separate queries
+            # re-scanning the same 7 day window; the event_queue count lives in
+            # another collection and is issued concurrently
+            pipeline = [
+                {'$match': {'timestamp': {'$gte': start}}},
+                {'$facet': {
+                    'total'    : [{'$count': 'n'}],
+                    'avg'      : [{'$group': {'_id': None, 'avg': {'$avg': '$took'}}}],
+                    'completed': [{'$match': {'status': 'completed'}}, {'$count': 'n'}],
+                    'top_cmd'  : [{'$group': {'_id': '$command', 'count': {'$sum': 1}}},
+                                  {'$sort': {'count': -1}}, {'$limit': 5}],
+                    'top_chan' : [{'$group': {'_id': '$channel', 'count': {'$sum': 1}}},
+                                  {'$sort': {'count': -1}}, {'$limit': 5}],
+                }}
+            ]
+            facet_results, total_events_processed = await asyncio.gather(
+                self.collection.aggregate(pipeline).to_list(length=1),
+                self.db.event_queue.count_documents({'time_seen': {'$gte': start}})
+            )
+            facets = facet_results[0]
             desc += f"Total Events Processed:\n\t{total_events_processed}\n\n"
 
-            # get the total number of handled commands in the last 7 days
-            total_commands_handled = await self.collection.count_documents({'timestamp': {'$gte': start}})
+            total_commands_handled = facets['total'][0]['n'] if facets['total'] else 0
             desc += f"Total Commands Handled:\n\t{total_commands_handled}\n\n"
 
-            # get the average command response time in the last 7 days
-            avg_response_time = await self.collection.aggregate([
-                {'$match': {'timestamp': {'$gte': start}}},
-                {'$group': {'_id': None, 'avg': {'$avg': '$took'}}}
-            ]).to_list(length=1)
-            if avg_response_time[0]['avg'] is not None:
-                desc += f"Average Command Response Time:\n\t{avg_response_time[0]['avg']:.03} seconds\n\n"
-
-            # get completed rate in the last 7 days
-            completed_rate = await self.collection.aggregate([
-                {'$match': {'timestamp': {'$gte': start}, 'status': 'completed'}},
-                {'$group': {'_id': None, 'count': {'$sum': 1}}}
-            ]).to_list(length=1)
-            if completed_rate:
-                percent = completed_rate[0]['count'] / (total_commands_handled - 1)
+            if facets['avg'] and facets['avg'][0]['avg'] is not None:
+                desc += f"Average Command Response Time:\n\t{facets['avg'][0]['avg']:.03} seconds\n\n"
+
+            if facets['completed']:
+                percent = facets['completed'][0]['n'] / (total_commands_handled - 1)
                 desc += f"Command Success Rate:\n\t{percent:.03%}\n\n"
 
-            # get the 5 most used commands of the last 7 days
-            most_used_commands = await self.collection.aggregate([
-                {'$match': {'timestamp': {'$gte': start}}},
-                {'$group': {'_id': '$command', 'count': {'$sum': 1}}},
-                {'$sort': {'count': -1}}
-            ]).to_list(length=5)
             desc += "Top 5 Commands based on usage:\n"
-            for command in most_used_commands:
+            for command in facets['top_cmd']:
                 desc += f" - {command['_id']}: {command['count']}\n"
 
-            # get the top 5 channels of the last 7 days
-            top_channels = await self.collection.aggregate([
-                {'$match': {'timestamp': {'$gte': start}}},
-                {'$group': {'_id': '$channel', 'count': {'$sum': 1}}},
-                {'$sort': {'count': -1}}
-            ]).to_list(length=5)
             desc += "\nTop 5 Channels based on commands handled:\n"
-            for channel in top_channels:
+            for channel in facets['top_chan']:
                 desc += f" - {channel['_id']['name']}: {channel['count']}\n"
             e.description = desc + "```"
             await ctx.send(embed=e)
@@ -197,15 +194,15 @@ class Metrics(commands.Cog):
             await ctx.reply(embed=e, ephemeral=True)
 
         try:
-            # get the timestamp of when the command was called from the db
-            data = await self.collection.find_one({'_id': ctx.interaction.id})
+            # pipeline update (note the list form) so mongo computes the elapsed
+            # time server-side instead of us reading the timestamp back first
             await self.collection.update_one({'_id': ctx.interaction.id},
-                                             {
+                                             [{
                                                  '$set': {
                                                      'status': 'completed',
-                                                     'took'  : (datetime.utcnow() - data['timestamp']).total_seconds()
+                                                     'took'  : {'$divide': [{'$subtract': ['$$NOW', '$timestamp']}, 1000]}
                                                  }
-                                             })
+                                             }])
         except Exception as e:
             log.error(f"Failed to update command status to completed: {e}")
             await report_error(e)
@@ -238,16 +235,16 @@ class Metrics(commands.Cog):
                 await report_error(e)
 
         try:
-            # get the timestamp of when the command was called from the db
-            data = await self.collection.find_one({'_id': ctx.interaction.id})
+            # pipeline update (note the list form) so mongo computes the elapsed
+            # time server-side instead of us reading the timestamp back first
             await self.collection.update_one({'_id': ctx.interaction.id},
-                                             {
+                                             [{
                                                  '$set': {
                                                      'status': 'error',
-                                                     'took'  : (datetime.utcnow() - data['timestamp']).total_seconds(),
+                                                     'took'  : {'$divide': [{'$subtract': ['$$NOW', '$timestamp']}, 1000]},
                                                      'error' : str(excep)
                                                  }
-                                             })
+                                             }])
         except Exception as e:
             log.error(f"Failed to update command status to error: {e}")
             await report_error(e)
@@ -257,6 +254,15 @@ class Metrics(commands.Cog):
     @commands.Cog.listener()
     async def on_ready(self, ):
         log.info(f'Logged in as {self.bot.user.name} ({self.bot.user.id})')
+        # bound the /metrics aggregations to the 7-day window instead of a
+        # collection scan; createIndex is idempotent so this is safe on every start
+        await self.collection.create_indexes([
+            IndexModel([("timestamp", -1)]),
+            IndexModel([("timestamp", -1), ("status", 1)]),
+            IndexModel([("timestamp", -1), ("command", 1)]),
+            IndexModel([("timestamp", -1), ("channel.id", 1)]),
+        ])
+        await self.db.event_queue.create_index("time_seen")
 
 
 async def setup(bot):
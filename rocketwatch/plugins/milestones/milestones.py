@@ -73,7 +73,7 @@ class QueuedMilestones(commands.Cog):
                 payload.append(Response(
                     embed=embed,
                     topic="milestones",
-                    block_number=w3.eth.getBlock("latest").number,
+                    block_number=w3.eth.get_block_number(),
                     event_name=milestone.id,
                     unique_id=f"{milestone.id}:{latest_goal}",
                 ))
@@ -1,11 +1,14 @@
+import asyncio
 import logging
 import re
 from io import BytesIO
 
 import inflect
-import matplotlib.pyplot as plt
 import numpy as np
 import pymongo
+from cachetools import TTLCache
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from discord import File
 from discord.app_commands import describe
 from discord.ext import commands
@@ -21,36 +24,46 @@ p = inflect.engine()
 
 
 def get_percentiles(percentiles, counts):
-    for p in percentiles:
-        yield p, np.percentile(counts, p, interpolation='nearest')
+    # one np.percentile call sorts counts once for all requested percentiles
+    return zip(percentiles, np.percentile(counts, percentiles, interpolation='nearest'))
 
 
 async def minipool_distribution_raw(ctx: Context, distribution):
     e = Embed()
     e.title = "Minipool Distribution"
-    description = "```\n"
-    for minipools, nodes in distribution:
-        description += f"{p.no('minipool', minipools):>14}: " \
-                       f"{nodes:>4} {p.plural('node', nodes)}\n"
-    description += "```"
-    e.description = description
+    lines = [f"{p.no('minipool', minipools):>14}: {nodes:>4} {p.plural('node', nodes)}"
+             for minipools, nodes in distribution]
+    e.description = "```\n" + "\n".join(lines) + "\n```"
     await ctx.send(embed=e)
 
 
 class MinipoolDistribution(commands.Cog):
+    # memoizes the counts vector so back-to-back invocations skip the db round trip
+    _counts_cache = TTLCache(maxsize=1, ttl=60)
+
     def __init__(self, bot):
         self.bot = bot
 
         self.mongo = pymongo.MongoClient(cfg["mongodb_uri"])
         self.db = self.mongo.rocketwatch
 
-    def get_minipool_counts_per_node(self):
+        # persistent Agg figure reused across renders; figure construction is
+        # expensive and pyplot's global state is not needed here. Figures are
+        # not thread-safe, so renders are serialized through the lock
+        self._fig = Figure()
+        self._ax = self._fig.subplots(1, 1)
+        self._canvas = FigureCanvasAgg(self._fig)
+        self._render_lock = asyncio.Lock()
+
+    def get_minipool_counts_per_node(self) -> np.ndarray:
         # get an array for minipool counts per node from db using aggregation
         # example: [0,0,1,2,3,3,3]
         # 2 nodes have 0 minipools
         # 1 node has 1 minipool
         # 1 node has 2 minipools
         # 3 nodes have 3 minipools
+        if "counts" in self._counts_cache:
+            return self._counts_cache["counts"]
         pipeline = [
             {
                 '$match': {
@@ -72,7 +85,67 @@ class MinipoolDistribution(commands.Cog):
                 }
             }
         ]
-        return [x["count"] for x in self.db.minipools_new.aggregate(pipeline)]
+        counts = np.fromiter((x["count"] for x in self.db.minipools_new.aggregate(pipeline)), dtype=np.int32)
+        self._counts_cache["counts"] = counts
+        return counts
+
+    def _render_distribution(self, ks: np.ndarray, vals: np.ndarray, color: str) -> bytes:
+        ax = self._ax
+        ax.cla()
+
+        # First chart is sorted bars showing total minipools provided by nodes with x minipools per node
+        rects = ax.bar(ks.astype(str), ks * vals, color=color)
+        ax.bar_label(rects, rotation=90, padding=3, fontsize=7)
+        ax.set_ylabel("Total Minipools")
+        # tilt the x axis labels
+        ax.tick_params(axis='x', labelrotation=90, labelsize=7)
+        # Add a 5% buffer to the ylim to help fit all the bar labels
+        ax.set_ylim(top=(ax.get_ylim()[1] * 1.1))
+
+        self._fig.tight_layout()
+        img = BytesIO()
+        self._canvas.print_png(img)
+        return img.getvalue()
+
+    def _render_gini(self, x: np.ndarray, y: np.ndarray) -> bytes:
+        ax = self._ax
+        ax.cla()
+
+        ax.plot(x, y)
+        ax.set_xlabel("number of nodes")
+        ax.set_ylabel("protocol share")
+        ax.set_xscale("log")
+        ax.set_xlim((1, x[-1]))
+        ax.set_ylim((0, 1))
+
+        x_ticks = [x[-1]]
+
+        def draw_threshold(threshold: float, color: str) -> None:
+            index = y.searchsorted(threshold)
+            x_pos = x[index]
+            percentage = round(100 * threshold)
+            x_ticks.append(x_pos)
+            ax.axvline(x=x_pos, linestyle='--', c=color, label=f'{percentage}%')
+
+        draw_threshold(1 / 3, "tab:green")
+        draw_threshold(0.5, "tab:olive")
+        draw_threshold(2 / 3, "tab:orange")
+        draw_threshold(0.9, "tab:red")
+
+        # add powers of 10 to x ticks if not too close to existing ticks
+        i = 1
+        while i < x[-1]:
+            if not any((i / 1.5 < tick < i * 1.5) for tick in x_ticks):
+                x_ticks.append(i)
+            i *= 10
+
+        ax.set_xticks(x_ticks, map(str, x_ticks))
+        ax.legend()
+
+        self._fig.tight_layout()
+        img = BytesIO()
+        self._canvas.print_png(img)
+        return img.getvalue()
 
     @hybrid_command()
     @describe(raw="Show the raw Distribution Data")
@@ -87,49 +160,31 @@ class MinipoolDistribution(commands.Cog):
 
         # Get the minipool distribution
         counts = self.get_minipool_counts_per_node()
-        # Converts the array of counts, eg [ 0, 0, 0, 1, 1, 2 ], to a list of tuples
-        # where the first item is the number of minipools and the second item is the
-        # number of nodes, eg [ (0, 3), (1, 2), (2, 1) ]
+        # Converts the array of counts, eg [ 0, 0, 0, 1, 1, 2 ], into the
+        # occurring minipool counts (ks) and the number of nodes with each
+        # count (vals), eg ks = [0, 1, 2], vals = [3, 2, 1]
         bins = np.bincount(counts)
-        distribution = [(i, bins[i]) for i in range(len(bins)) if bins[i] > 0]
+        ks = np.nonzero(bins)[0]
+        vals = bins[ks]
 
         # If the raw data were requested, print them and exit early
         if raw:
-            await minipool_distribution_raw(ctx, distribution[::-1])
+            await minipool_distribution_raw(ctx, list(zip(ks.tolist(), vals.tolist()))[::-1])
             return
 
-        img = BytesIO()
-        fig, ax = plt.subplots(1, 1)
-
-        # First chart is sorted bars showing total minipools provided by nodes with x minipools per node
-        bars = {x: x * y for x, y in distribution}
-        # Remove the 0,0 value, since it doesn't provide any insight
-        x_keys = [str(x) for x in bars]
-        rects = ax.bar(x_keys, bars.values(), color=str(e.color))
-        ax.bar_label(rects, rotation=90, padding=3, fontsize=7)
-        ax.set_ylabel("Total Minipools")
-        # tilt the x axis labels
-        ax.tick_params(axis='x', labelrotation=90, labelsize=7)
-        # Add a 5% buffer to the ylim to help fit all the bar labels
-        ax.set_ylim(top=(ax.get_ylim()[1] * 1.1))
-
-        fig.tight_layout()
-        fig.savefig(img, format='png')
-        img.seek(0)
-
-        fig.clf()
-        plt.close()
+        # render on a worker thread so the PNG encode doesn't stall the event loop
+        async with self._render_lock:
+            png = await asyncio.to_thread(self._render_distribution, ks, vals, str(e.color))
 
         e.title = "Minipool Distribution"
         e.set_image(url="attachment://graph.png")
-        f = File(img, filename="graph.png")
+        f = File(BytesIO(png), filename="graph.png")
         percentile_strings = [f"{x[0]}th percentile: {p.no('minipool', int(x[1]))} per node" for x in
                               get_percentiles([50, 75, 90, 99], counts) if x[1]]
-        percentile_strings.append(f"Max: {distribution[-1][0]} minipools per node")
+        percentile_strings.append(f"Max: {ks[-1]} minipools per node")
         percentile_strings.append(f"Total: {p.no('minipool', sum(counts))}")
         e.set_footer(text="\n".join(percentile_strings))
         await ctx.send(embed=e, files=[f])
-        img.close()
 
     @hybrid_command()
     @describe(raw="Show the raw distribution data")
@@ -141,7 +196,8 @@ class MinipoolDistribution(commands.Cog):
         e = Embed()
         e.title = "Validator Share of Largest Nodes"
 
-        minipool_counts = np.array(self.get_minipool_counts_per_node())
+        # copy since the cached array is shared and sorted in place below
+        minipool_counts = self.get_minipool_counts_per_node().copy()
         # sort descending
         minipool_counts[::-1].sort()
 
@@ -171,53 +227,14 @@ class MinipoolDistribution(commands.Cog):
             await ctx.send(embed=e)
             return
 
-        fig, ax = plt.subplots(1, 1)
-
-        ax.plot(x, y)
-        ax.set_xlabel("number of nodes")
-        ax.set_ylabel("protocol share")
-        ax.set_xscale("log")
-        ax.set_xlim((1, x[-1]))
-        ax.set_ylim((0, 1))
-
-        x_ticks = [x[-1]]
-
-        def draw_threshold(threshold: float, color: str) -> None:
-            index = y.searchsorted(threshold)
-            x_pos = x[index]
-            percentage = round(100 * threshold)
-            x_ticks.append(x_pos)
-            ax.axvline(x=x_pos, linestyle='--', c=color, label=f'{percentage}%')
-
-        draw_threshold(1 / 3, "tab:green")
-        draw_threshold(0.5, "tab:olive")
-        draw_threshold(2 / 3, "tab:orange")
-        draw_threshold(0.9, "tab:red")
-
-        # add powers of 10 to x ticks if not too close to existing ticks
-        i = 1
-        while i < x[-1]:
-            if not any((i / 1.5 < tick < i * 1.5) for tick in x_ticks):
-                x_ticks.append(i)
-            i *= 10
-
-        ax.set_xticks(x_ticks, map(str, x_ticks))
-        ax.legend()
-
-        fig.tight_layout()
-
-        img = BytesIO()
-        fig.savefig(img, format="png")
-        img.seek(0)
-
-        fig.clf()
-        plt.close()
+        # render on a worker thread so the PNG encode doesn't stall the event loop
+        async with self._render_lock:
+            png = await asyncio.to_thread(self._render_gini, x, y)
 
         e.set_image(url="attachment://graph.png")
-        f = File(img, filename="graph.png")
+        f = File(BytesIO(png), filename="graph.png")
 
         await ctx.send(embed=e, files=[f])
-        img.close()
 
 
 async def setup(bot):
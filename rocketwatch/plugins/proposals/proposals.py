@@ -1,4 +1,5 @@
-import matplotlib.pyplot as plt
+import asyncio
+from collections import deque
 from datetime import datetime, timedelta
 import logging
 import re
@@ -6,6 +7,7 @@ import time
 from io import BytesIO
 
 import aiohttp
+import ijson
 import matplotlib as mpl
 import numpy as np
 from PIL import Image
@@ -13,9 +15,9 @@ from discord import File
 from discord.ext import commands
 from discord.ext.commands import Context
 from discord.ext.commands import hybrid_command
-from matplotlib import pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import ReplaceOne
 from wordcloud import WordCloud
 
 from utils.cfg import cfg
@@ -75,6 +77,14 @@ PROPOSAL_TEMPLATE = {
 # noinspection RegExpUnnecessaryNonCapturingGroup
 SMARTNODE_REGEX = re.compile(r"^RP(?:(?:-)([A-Z])([A-Z])?)? (?:v)?(\d+\.\d+\.\d+(?:-\w+)?)(?:(?:(?: \()|(?: gw:))(.+)(?:\)))?")
 
+# compiled once at import; parse_propsal runs over tens of thousands of
+# graffiti strings during a full refresh, and one alternation scan per
+# client family beats a substring search per client name
+_CONSENSUS_MAP = {v.lower(): v for v in LOOKUP["consensus"].values()}
+_EXECUTION_MAP = {v.lower(): v for v in LOOKUP["execution"].values()}
+_CONSENSUS_RE = re.compile("|".join(map(re.escape, _CONSENSUS_MAP)))
+_EXECUTION_RE = re.compile("|".join(map(re.escape, _EXECUTION_MAP)))
+
 
 def parse_propsal(entry):
     graffiti = bytes.fromhex(entry["validator"]["graffiti"][2:]).decode("utf-8").rstrip('\x00')
@@ -83,8 +93,10 @@ def parse_propsal(entry):
         "validator": int(entry["validator"]["index"]),
         "graffiti" : graffiti,
     }
-    if m := SMARTNODE_REGEX.findall(graffiti):
-        groups = m[0]
+    # cheap prefix screen before firing up the regex engine; the vast
+    # majority of proposals are not smart node graffiti
+    if graffiti.startswith("RP") and (m := SMARTNODE_REGEX.match(graffiti)):
+        groups = m.groups()
         # smart node proposal
         data["type"] = "Smart Node"
         data["version"] = groups[2]
@@ -104,14 +116,10 @@ def parse_propsal(entry):
         # normal proposal
         # try to detect the client from the graffiti
         graffiti = graffiti.lower()
-        for client in LOOKUP["consensus"].values():
-            if client.lower() in graffiti:
-                data["consensus_client"] = client
-                break
-        for client in LOOKUP["execution"].values():
-            if client.lower() in graffiti:
-                data["execution_client"] = client
-                break
+        if m := _CONSENSUS_RE.search(graffiti):
+            data["consensus_client"] = _CONSENSUS_MAP[m.group(0)]
+        if m := _EXECUTION_RE.search(graffiti):
+            data["execution_client"] = _EXECUTION_MAP[m.group(0)]
     return data
 
 
@@ -123,6 +131,15 @@ class Proposals(commands.Cog):
         # connect to local mongodb
         self.db = AsyncIOMotorClient(cfg["mongodb_uri"]).get_database("rocketwatch")
         self.created_view = False
+        # the word cloud mask and font never change; decode the mask once
+        # instead of re-reading the png on every comments invocation
+        self._wc_mask = np.array(Image.open("./plugins/proposals/assets/logo-words.png"))
+        self._wc_font = "./plugins/proposals/assets/noto.ttf"
+        # one reusable figure per cog instead of going through pyplot's global
+        # state; the lock serializes access to it across concurrent commands
+        self._fig = Figure()
+        self._canvas = FigureCanvasAgg(self._fig)
+        self._render_lock = asyncio.Lock()
 
     async def create_minipool_proposal_view(self):
         if self.created_view:
@@ -148,6 +165,10 @@ class Proposals(commands.Cog):
                             '$sort': {
                                 'slot': -1
                             }
+                        }, {
+                            # only the latest proposal is read downstream, stop
+                            # mongo from materializing the whole sorted array
+                            '$limit': 1
                         }
                     ]
                 }
@@ -185,10 +206,13 @@ class Proposals(commands.Cog):
                 }
             }, {
                 '$lookup': {
-                    'from'        : 'proposals',
-                    'localField'  : 'slot',
-                    'foreignField': 'slot',
-                    'as'          : 'proposals'
+                    'from'    : 'proposals',
+                    'let'     : {'s': '$slot'},
+                    'pipeline': [
+                        {'$match': {'$expr': {'$eq': ['$slot', '$$s']}}},
+                        {'$limit': 1}
+                    ],
+                    'as'      : 'proposals'
                 }
             }, {
                 '$project': {
@@ -202,6 +226,8 @@ class Proposals(commands.Cog):
                 }
             }
         ]
+        # covers the per-validator latest-proposal lookup above
+        await self.db.proposals.create_index([("validator", 1), ("slot", -1)])
         await self.db.minipool_proposals.drop()
         await self.db.create_collection(
             "minipool_proposals",
@@ -212,16 +238,36 @@ class Proposals(commands.Cog):
 
     async def gather_all_proposals(self):
         log.info("getting all proposals using the rocketscan.dev API")
+        await self.db.proposals.create_index("slot", unique=True)
+        await self.db.proposals_tmp.drop()
+        # stream-parse the multi-MB payload instead of buffering it whole,
+        # flushing parsed batches to the scratch collection while the rest of
+        # the response is still in flight
+        buf = []
         async with aiohttp.ClientSession() as session:
             async with session.get(self.rocketscan_proposals_url) as resp:
                 if resp.status != 200:
                     log.error("failed to get proposals using the rocketscan.dev API")
                     return
-                proposals = await resp.json()
+                async for entry in ijson.items_async(resp.content, "item"):
+                    buf.append(PROPOSAL_TEMPLATE | parse_propsal(entry))
+                    if len(buf) >= 1000:
+                        await self.db.proposals_tmp.insert_many(buf, ordered=False)
+                        buf.clear()
+        if buf:
+            await self.db.proposals_tmp.insert_many(buf, ordered=False)
         log.info("got all proposals using the rocketscan.dev API")
-        await self.db.proposals.bulk_write([ReplaceOne({"slot": int(entry["number"])},
-                                                       PROPOSAL_TEMPLATE | parse_propsal(entry),
-                                                       upsert=True) for entry in proposals])
+        # land the full refresh as a server-side $merge instead of shipping
+        # one ReplaceOne (filter included) per proposal
+        await self.db.proposals_tmp.aggregate([{
+            "$merge": {
+                "into"          : "proposals",
+                "on"            : "slot",
+                "whenMatched"   : "replace",
+                "whenNotMatched": "insert"
+            }
+        }]).to_list(None)
+        await self.db.proposals_tmp.drop()
         log.info("finished gathering all proposals")
 
     async def chore(self, ctx: Context):
@@ -299,15 +345,31 @@ class Proposals(commands.Cog):
                         "**If an old version is shown as 10%, it means that it was 10% of the proposals in the last 5 days.**\n" \
                         "_No it does not mean that the minipools simply haven't proposed with the new version yet._\n" \
                         "This only looks at proposals, it does not care about what individual minipools do."
-        # get proposals
-        # limit to 6 months
-        proposals = await self.db.proposals.find(
+        # limit to 6 months; group per (day bucket, version) server-side so
+        # python receives a few hundred aggregate rows instead of every
+        # proposal document of the last half year
+        bucket_size = int(60 / 12 * 60 * 24)  # one day of slots
+        rows = await self.db.proposals.aggregate([
             {
-                "version": {"$exists": 1},
-                "slot"   : {"$gt": date_to_beacon_block((datetime.now() - timedelta(days=180)).timestamp())}
-            }).sort("slot", 1).to_list(None)
+                '$match': {
+                    'version': {'$exists': 1},
+                    'slot'   : {'$gt': date_to_beacon_block((datetime.now() - timedelta(days=180)).timestamp())}
+                }
+            }, {
+                '$group': {
+                    '_id'  : {
+                        'bucket' : {'$floor': {'$divide': ['$slot', bucket_size]}},
+                        'version': '$version'
+                    },
+                    'count': {'$sum': 1}
+                }
+            }, {
+                '$sort': {'_id.bucket': 1}
+            }
+        ]).to_list(None)
         look_back = int(60 / 12 * 60 * 24 * 2)  # last 2 days
-        max_slot = proposals[-1]["slot"]
+        latest = await self.db.proposals.find_one({"version": {"$exists": 1}}, sort=[("slot", -1)])
+        max_slot = latest["slot"]
         # get version used after max_slot - look_back
         # and have at least 10 occurrences
         start_slot = max_slot - look_back
@@ -332,36 +394,39 @@ class Proposals(commands.Cog):
             }
         ]).to_list(None)
         recent_versions = [v['_id'] for v in recent_versions]
-        data = {}
+        # reshape the aggregate rows into per-bucket version counts
+        buckets: dict[int, dict[str, int]] = {}
         versions = []
-        proposal_buffer = []
-        tmp_data = {}
-        for i, proposal in enumerate(proposals):
-            proposal_buffer.append(proposal)
-            if proposal["version"] not in versions:
-                versions.append(proposal["version"])
-            tmp_data[proposal["version"]] = tmp_data.get(proposal["version"], 0) + 1
-            slot = proposal["slot"]
-            if i < 200:
+        for row in rows:
+            bucket = int(row['_id']['bucket'])
+            version = row['_id']['version']
+            buckets.setdefault(bucket, {})[version] = row['count']
+            if version not in versions:
+                versions.append(version)
+
+        # rebuild the 5-day rolling window over the daily buckets
+        data = {}
+        window = deque()
+        first_bucket = min(buckets)
+        for bucket in sorted(buckets):
+            window.append(bucket)
+            while window[0] <= bucket - 5:
+                window.popleft()
+            # skip dates where the window isn't filled yet
+            if bucket - first_bucket < 4:
                 continue
-            while proposal_buffer[0]["slot"] < slot - (60 / 12 * 60 * 24 * 5):
-                to_remove = proposal_buffer.pop(0)
-                tmp_data[to_remove["version"]] -= 1
-            date = datetime.fromtimestamp(beacon_block_to_date(slot))
-            data[date] = tmp_data.copy()
-
-        # normalize data
-        for date, value in data.items():
-            total = sum(data[date].values())
-            for version in data[date]:
-                value[version] /= total
-
-        # use plt.stackplot to stack the data
+            tmp_data = {}
+            for b in window:
+                for version, count in buckets[b].items():
+                    tmp_data[version] = tmp_data.get(version, 0) + count
+            date = datetime.fromtimestamp(beacon_block_to_date((bucket + 1) * bucket_size))
+            data[date] = tmp_data
+
+        # stack the snapshots into an (S, V) matrix and normalize each row in
+        # one vectorized pass instead of nested python loops over dicts
         x = list(data.keys())
-        y = {v: [] for v in versions}
-        for date, value_ in data.items():
-            for version in versions:
-                y[version].append(value_.get(version, 0))
+        y = np.array([[data[date].get(v, 0) for v in versions] for date in x], dtype=np.float64)
+        y /= y.sum(axis=1, keepdims=True)
 
         # matplotlib default color
         matplotlib_colors = [color['color'] for color in list(mpl.rcParams['axes.prop_cycle'])]
@@ -374,47 +439,57 @@ class Proposals(commands.Cog):
             if version in recent_versions:
                 colors[i] = recent_colors[recent_versions.index(version)]
 
-        last_slot_data = data[max(x)]
+        last_slot_data = dict(zip(versions, y[-1]))
         last_slot_data = {v: last_slot_data[v] for v in recent_versions}
         labels = [f"{v} ({last_slot_data[v]:.2%})" if v in recent_versions else "_nolegend_" for v in versions]
-        # add percentage to labels
-        ax = plt.subplot(111, frameon=False)
-        plt.stackplot(x, *y.values(), labels=labels, colors=colors)
-        # hide y axis
-        plt.tick_params(axis='y', which='both', left=False, right=False, labelleft=False)
-        ax.legend(loc="upper left")
-        # add a thin line at current time from y=0 to y=1 with a width of 0.5
-        plt.plot([max(x), max(x)], [0, 1], color="white", alpha=0.25)
-        # calculate future point to make latest data more visible
-        diff = x[-1] - x[0]
-        future_point = x[-1] + (diff * 0.05)
-        last_y_values = [[yy[-1]] * 2 for yy in y.values()]
-        plt.stackplot([x[-1], future_point], *last_y_values, colors=colors)
-        plt.tight_layout()
-
-        # the title should mention that the /version_chart command contains more information about how this chart works. but short
-        plt.title("READ DESC OF /version_chart IF CONFUSED", y=0.95, fontsize=9)
-
-        # respond with image
-        img = BytesIO()
-        plt.savefig(img, format="png", bbox_inches="tight", dpi=300)
-        img.seek(0)
-        plt.close()
+
+        def render() -> bytes:
+            self._fig.clf()
+            self._fig.set_size_inches(*mpl.rcParams["figure.figsize"])
+            ax = self._fig.add_subplot(111, frameon=False)
+            ax.stackplot(x, y.T, labels=labels, colors=colors)
+            # hide y axis
+            ax.tick_params(axis='y', which='both', left=False, right=False, labelleft=False)
+            ax.legend(loc="upper left")
+            # add a thin line at current time from y=0 to y=1 with a width of 0.5
+            ax.plot([x[-1], x[-1]], [0, 1], color="white", alpha=0.25)
+            # calculate future point to make latest data more visible
+            diff = x[-1] - x[0]
+            future_point = x[-1] + (diff * 0.05)
+            last_y_values = [[yy] * 2 for yy in y[-1]]
+            ax.stackplot([x[-1], future_point], *last_y_values, colors=colors)
+            self._fig.tight_layout()
+
+            # the title should mention that the /version_chart command contains more information about how this chart works. but short
+            ax.set_title("READ DESC OF /version_chart IF CONFUSED", y=0.95, fontsize=9)
+
+            img = BytesIO()
+            self._fig.savefig(img, format="png", bbox_inches="tight", dpi=300,
+                              pil_kwargs={"compress_level": 3, "optimize": False})
+            self._fig.clf()
+            return img.getvalue()
+
+        async with self._render_lock:
+            png = await asyncio.to_thread(render)
         e.set_image(url="attachment://chart.png")
 
         # send data
-        await msg.edit(content="", embed=e, attachments=[File(img, filename="chart.png")])
-        img.close()
-
-    async def plot_axes_with_data(self, attr: str, ax1, ax2, name, remove_allnodes=False):
-        # group by client and get count
-        data = await self.gather_attribute(attr, remove_allnodes)
+        await msg.edit(content="", embed=e, attachments=[File(BytesIO(png), filename="chart.png")])
+
+    async def gather_pie_data(self, attr: str, remove_allnodes=False):
+        # group by client and get count; the attribute aggregation and the two
+        # total-count queries are independent, run them concurrently
+        data, all_minipools, all_node_operators = await asyncio.gather(
+            self.gather_attribute(attr, remove_allnodes),
+            self.db.minipools_new.find({"beacon.status": "active_ongoing", "status": "staking"}).distinct("_id"),
+            self.db.minipools_new.find({"beacon.status": "active_ongoing", "status": "staking"}).distinct("node_operator")
+        )
 
         minipools = [(x, y["validator_count"]) for x, y in data.items() if x != "remove_from_total"]
         minipools = sorted(minipools, key=lambda x: x[1])
 
         # get total minipool count from rocketpool
-        unobserved_minipools = len(await self.db.minipools_new.find({"beacon.status": "active_ongoing", "status": "staking"}).distinct("_id")) - sum(d[1] for d in minipools)
+        unobserved_minipools = len(all_minipools) - sum(d[1] for d in minipools)
         if "remove_from_total" in data:
             unobserved_minipools -= data["remove_from_total"]["validator_count"]
         minipools.insert(0, ("No proposals yet", unobserved_minipools))
@@ -430,7 +505,7 @@ class Proposals(commands.Cog):
         node_operators = sorted(node_operators, key=lambda x: x[1])
 
         # get total node operator count from rp
-        unobserved_node_operators = len(await self.db.minipools_new.find({"beacon.status": "active_ongoing", "status": "staking"}).distinct("node_operator")) - sum(d[1] for d in node_operators)
+        unobserved_node_operators = len(all_node_operators) - sum(d[1] for d in node_operators)
         if "remove_from_total" in data:
             unobserved_node_operators -= data["remove_from_total"]["count"]
         node_operators.insert(0, ("No proposals yet", unobserved_node_operators))
@@ -441,6 +516,10 @@ class Proposals(commands.Cog):
         if "External" in [x for x, y in node_operators]:
             node_operators.insert(2, node_operators.pop([i for i, (x, y) in enumerate(node_operators) if x == "External"][0]))
 
+        return minipools, node_operators
+
+    @staticmethod
+    def _draw_pies(ax1, ax2, minipools, node_operators):
         # sort data
         ax1.pie(
             [x[1] for x in minipools],
@@ -478,29 +557,32 @@ class Proposals(commands.Cog):
         ax2.set_title("Node Operators", fontsize=22)
 
     async def proposal_vs_node_operators_embed(self, attribute, name, msg, remove_allnodes=False):
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 8))
-        # iterate axes in pairs
         title = f"Rocket Pool {name} Distribution {'without Allnodes' if remove_allnodes else ''}"
         await msg.edit(content=f"generating {attribute} distribution graph...")
-        await self.plot_axes_with_data(attribute, ax1, ax2, name, remove_allnodes)
+        minipools, node_operators = await self.gather_pie_data(attribute, remove_allnodes)
 
         e = Embed(title=title)
 
-        fig.subplots_adjust(left=0, right=1, top=0.9, bottom=0, wspace=0)
-        # set title
-        fig.suptitle(title, fontsize=24)
-
-        # respond with image
-        img = BytesIO()
-        plt.savefig(img, format="png")
-        img.seek(0)
-        plt.close()
+        def render() -> bytes:
+            self._fig.clf()
+            self._fig.set_size_inches(12, 8)
+            ax1, ax2 = self._fig.subplots(1, 2)
+            self._draw_pies(ax1, ax2, minipools, node_operators)
+            self._fig.subplots_adjust(left=0, right=1, top=0.9, bottom=0, wspace=0)
+            # set title
+            self._fig.suptitle(title, fontsize=24)
+
+            img = BytesIO()
+            self._fig.savefig(img, format="png", pil_kwargs={"compress_level": 3, "optimize": False})
+            self._fig.clf()
+            return img.getvalue()
+
+        async with self._render_lock:
+            png = await asyncio.to_thread(render)
         e.set_image(url=f"attachment://{attribute}.png")
 
         # send data
-        f = File(img, filename=f"{attribute}.png")
-        img.close()
-        return e, f
+        return e, File(BytesIO(png), filename=f"{attribute}.png")
 
     @hybrid_command()
     async def client_distribution(self, ctx: Context, remove_allnodes=False):
@@ -535,20 +617,15 @@ class Proposals(commands.Cog):
         msg = await self.chore(ctx)
         await msg.edit(content="generating comments word cloud...")
 
-        # load image
-        mask = np.array(Image.open("./plugins/proposals/assets/logo-words.png"))
-
-        # load font
-        font_path = "./plugins/proposals/assets/noto.ttf"
-
+        # a fresh WordCloud per call on purpose: fit_words mutates its state
         wc = WordCloud(max_words=2 ** 16,
                        scale=2,
-                       mask=mask,
+                       mask=self._wc_mask,
                        max_font_size=100,
                        min_font_size=1,
                        background_color="white",
                        relative_scaling=0,
-                       font_path=font_path,
+                       font_path=self._wc_font,
                        color_func=lambda *args, **kwargs: "rgb(235, 142, 85)")
 
         # aggregate comments with their count
@@ -559,18 +636,20 @@ class Proposals(commands.Cog):
         ]).to_list(None)
         comment_words = {x['_id']: x["count"] for x in comments}
 
-        # generate word cloud
-        wc.fit_words(comment_words)
-
-        # respond with image
-        img = BytesIO()
-        wc.to_image().save(img, format="png")
-        img.seek(0)
-        plt.close()
+        def render() -> bytes:
+            # generate word cloud
+            wc.fit_words(comment_words)
+            img = BytesIO()
+            # the word cloud is a large scale-2 raster and its encode dominates
+            # the command; level 1 is noticeably faster again than the level 3
+            # used for the small charts
+            wc.to_image().save(img, format="png", compress_level=1, optimize=False)
+            return img.getvalue()
+
+        png = await asyncio.to_thread(render)
         e = Embed(title="Rocket Pool Proposal Comments")
         e.set_image(url="attachment://image.png")
-        await msg.edit(content="", embed=e, attachments=[File(img, filename="image.png")])
-        img.close()
+        await msg.edit(content="", embed=e, attachments=[File(BytesIO(png), filename="image.png")])
 
     @hybrid_command()
     async def client_combo_ranking(self, ctx: Context, remove_allnodes=False, group_by_node_operators=False):
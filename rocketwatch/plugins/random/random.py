@@ -3,11 +3,11 @@ import csv
 import io
 import logging
 from datetime import datetime, timezone, timedelta
+from zoneinfo import ZoneInfo
 
 import aiohttp
 import dice
 import humanize
-import pytz
 import requests
 from discord import File
 from discord.ext import commands
@@ -27,6 +27,19 @@ from utils.visibility import is_hidden, is_hidden_weak
 log = logging.getLogger("random")
 log.setLevel(cfg["log_level"])
 
+# zoneinfo caches these process-wide; pytz re-parsed tzdata per lookup
+_UTC = ZoneInfo("UTC")
+_DEV_TZ = ZoneInfo("Australia/Lindeman")
+_JOE_TZ = ZoneInfo("America/New_York")
+_FORNAX_TZ = ZoneInfo("America/Sao_Paulo")
+_TIME_FORMAT = "%A %H:%M:%S %Z"
+
+# the sea creature listing never changes, build the field tuples once
+_SEA_CREATURE_FIELDS = [
+    (f"{sea_creature}:", f"holds over {holding_value} ETH worth of assets")
+    for holding_value, sea_creature in sea_creatures.items()
+]
+
 
 class Random(commands.Cog):
     def __init__(self, bot):
@@ -114,30 +127,28 @@ class Random(commands.Cog):
     async def dev_time(self, ctx: Context):
         """Timezones too confusing to you? Well worry no more, this command is here to help!"""
         e = Embed()
-        time_format = "%A %H:%M:%S %Z"
 
-        dev_time = datetime.now(tz=pytz.timezone("UTC"))
+        dev_time = datetime.now(tz=_UTC)
         # seconds since midnight
-        midnight = dev_time.replace(hour=0, minute=0, second=0, microsecond=0)
-        percentage_of_day = (dev_time - midnight).seconds / (24 * 60 * 60)
+        percentage_of_day = (dev_time.hour * 3600 + dev_time.minute * 60 + dev_time.second) / (24 * 60 * 60)
         # convert to uint16
         uint_day = int(percentage_of_day * 65535)
         # generate binary string
         binary_day = f"{uint_day:016b}"
         e.add_field(name="Coordinated Universal Time",
-                    value=f"{dev_time.strftime(time_format)}\n"
+                    value=f"{dev_time.strftime(_TIME_FORMAT)}\n"
                           f"`{binary_day} (0x{uint_day:04x})`")
         b = solidity.slot_to_beacon_day_epoch_slot(int(bacon.get_block("head")["data"]["message"]["slot"]))
         e.add_field(name="Beacon Time", value=f"Day {b[0]}, {b[1]}:{b[2]}")
 
-        dev_time = datetime.now(tz=pytz.timezone("Australia/Lindeman"))
-        e.add_field(name="Time for most of the Dev Team", value=dev_time.strftime(time_format), inline=False)
+        dev_time = datetime.now(tz=_DEV_TZ)
+        e.add_field(name="Time for most of the Dev Team", value=dev_time.strftime(_TIME_FORMAT), inline=False)
 
-        joe_time = datetime.now(tz=pytz.timezone("America/New_York"))
-        e.add_field(name="Joe's Time", value=joe_time.strftime(time_format), inline=False)
+        joe_time = datetime.now(tz=_JOE_TZ)
+        e.add_field(name="Joe's Time", value=joe_time.strftime(_TIME_FORMAT), inline=False)
 
-        fornax_time = datetime.now(tz=pytz.timezone("America/Sao_Paulo"))
-        e.add_field(name="Fornax's Time", value=fornax_time.strftime(time_format), inline=False)
+        fornax_time = datetime.now(tz=_FORNAX_TZ)
+        e.add_field(name="Fornax's Time", value=fornax_time.strftime(_TIME_FORMAT), inline=False)
 
         await ctx.send(embed=e)
 
@@ -168,9 +179,8 @@ class Random(commands.Cog):
         else:
             e.title = "Possible Sea Creatures"
             e.description = "RPL (both old and new), rETH and ETH are consider as assets for the sea creature determination!"
-            for holding_value, sea_creature in sea_creatures.items():
-                e.add_field(name=f"{sea_creature}:", value=f"holds over {holding_value} ETH worth of assets",
-                            inline=False)
+            for name, value in _SEA_CREATURE_FIELDS:
+                e.add_field(name=name, value=value, inline=False)
         await ctx.send(embed=e)
         return
 
@@ -312,7 +322,7 @@ class Random(commands.Cog):
         c = rp.get_contract_by_name("rocketDAONodeTrustedActions")
         # get challenges made
         events = c.events["ActionChallengeMade"].createFilter(
-            fromBlock=w3.eth.get_block("latest").number - 7 * 24 * 60 * 60 // 12)
+            fromBlock=w3.eth.get_block_number() - 7 * 24 * 60 * 60 // 12)
         # get all events
         events = events.get_all_entries()
         # remove all events of nodes that aren't challenged anymore
@@ -66,11 +66,11 @@ class RETHAPR(commands.Cog):
         block = w3.eth.getBlock(block_number)
         return datetime.fromtimestamp(block["timestamp"])
 
-    async def gather_new_data(self):
-        # get latest block update from the db
-        latest_db_block = await self.db.reth_apr.find_one(sort=[("block", -1)])
-        latest_db_block = 0 if latest_db_block is None else latest_db_block["block"]
-        cursor_block = historical_w3.eth.getBlock("latest")["number"]
+    @staticmethod
+    def _fetch_new_datapoints(latest_db_block):
+        # blocking chain walk, runs off-loop via asyncio.to_thread
+        datapoints = []
+        cursor_block = historical_w3.eth.get_block_number()
         while True:
             # get address of rocketNetworkBalances contract at cursor block
             address = rp.uncached_get_address_by_name("rocketNetworkBalances", block=cursor_block)
@@ -84,14 +84,21 @@ class RETHAPR(commands.Cog):
             reth_ratio = solidity.to_float(rp.call("rocketTokenRETH.getExchangeRate", block=cursor_block))
             effectiveness = solidity.to_float(
                 rp.call("rocketNetworkBalances.getETHUtilizationRate", block=cursor_block, address=address))
-            await self.db.reth_apr.insert_one({
+            datapoints.append({
                 "block"        : balance_block,
                 "time"         : block_time,
                 "value"        : reth_ratio,
                 "effectiveness": effectiveness
             })
             cursor_block = balance_block - 1
-            await asyncio.sleep(0.01)
+        return datapoints
+
+    async def gather_new_data(self):
+        # get latest block update from the db
+        latest_db_block = await self.db.reth_apr.find_one(sort=[("block", -1)])
+        latest_db_block = 0 if latest_db_block is None else latest_db_block["block"]
+        if datapoints := await asyncio.to_thread(self._fetch_new_datapoints, latest_db_block):
+            await self.db.reth_apr.insert_many(datapoints)
 
     @hybrid_command()
     async def current_reth_apr(self, ctx: Context):
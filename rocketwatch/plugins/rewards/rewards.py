@@ -1,9 +1,12 @@
+import asyncio
 import logging
-import requests
+import aiohttp
 import numpy as np
-import matplotlib.pyplot as plt
 
 from io import BytesIO
+from cachetools import TTLCache
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from discord import File
 from discord.app_commands import describe
 from discord.ext import commands
@@ -28,6 +31,19 @@ log.setLevel(cfg["log_level"])
 class Rewards(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        # short-lived cache of sprocketpool responses per node; repeat commands
+        # for the same node within a minute skip the full HTTPS round trip
+        self._node_data = TTLCache(maxsize=256, ttl=60)
+        # in-flight requests, so concurrent commands share one upstream call
+        self._inflight: dict[str, asyncio.Future] = {}
+        # claim interval time only changes via DAO vote, cache it per block
+        self._interval_time = TTLCache(maxsize=16, ttl=3600)
+        # one reusable figure instead of pyplot's global state; the lock
+        # serializes access to it across concurrent commands
+        self._fig = Figure(figsize=(5, 2.5))
+        self._canvas = FigureCanvasAgg(self._fig)
+        self._render_lock = asyncio.Lock()
 
     @dataclass
     class RewardEstimate:
@@ -41,14 +57,34 @@ class Rewards(commands.Cog):
         eth_rewards: float
         system_weight: float
 
-    @staticmethod
-    async def get_estimated_rewards(ctx: Context, address: str) -> Optional[RewardEstimate]:
+    async def _fetch_node_data(self, address: str) -> dict:
+        if (data := self._node_data.get(address)) is not None:
+            return data
+
+        if (future := self._inflight.get(address)) is not None:
+            return await future
+
+        future = asyncio.get_event_loop().create_future()
+        self._inflight[address] = future
+        try:
+            async with self.session.get(f"https://sprocketpool.net/api/node/{address}") as resp:
+                data = await resp.json()
+            self._node_data[address] = data
+            future.set_result(data)
+        except Exception as err:
+            future.set_exception(err)
+            raise
+        finally:
+            del self._inflight[address]
+        return data
+
+    async def get_estimated_rewards(self, ctx: Context, address: str) -> Optional[RewardEstimate]:
         if not rp.call("rocketNodeManager.getNodeExists", address):
             await ctx.send(f"{address} is not a registered node.")
             return None
 
         try:
-            patches_res = requests.get(f"https://sprocketpool.net/api/node/{address}").json()
+            patches_res = await self._fetch_node_data(address)
         except Exception as e:
             await report_error(ctx, e)
             await ctx.send("Error fetching node data from Sprocket Pool API. Blame Patches.")
@@ -57,7 +93,9 @@ class Rewards(commands.Cog):
         data_block, _ = get_block_by_timestamp(patches_res["time"])
         rpl_rewards: int = patches_res[address].get("collateralRpl", 0)
         eth_rewards: int = patches_res[address].get("smoothingPoolEth", 0)
-        interval_time = rp.call("rocketDAOProtocolSettingsRewards.getRewardsClaimIntervalTime", block=data_block)
+        if (interval_time := self._interval_time.get(data_block)) is None:
+            interval_time = rp.call("rocketDAOProtocolSettingsRewards.getRewardsClaimIntervalTime", block=data_block)
+            self._interval_time[data_block] = interval_time
 
         return Rewards.RewardEstimate(
             address=address,
@@ -144,15 +182,23 @@ class Rewards(commands.Cog):
         data_block: int = rewards.data_block
         reward_start_block, _ = get_block_by_timestamp(rewards.start_time)
 
-        rpl_min: float = solidity.to_float(rp.call("rocketDAOProtocolSettingsNode.getMinimumPerMinipoolStake", block=data_block))
-        rpl_ratio = solidity.to_float(rp.call("rocketNetworkPrices.getRPLPrice", block=data_block))
-        actual_borrowed_eth = solidity.to_float(rp.call("rocketNodeStaking.getNodeETHMatched", address, block=data_block))
-        actual_rpl_stake = solidity.to_float(rp.call("rocketNodeStaking.getNodeRPLStake", address, block=data_block))
-
-        inflation_rate: int = rp.call("rocketTokenRPL.getInflationIntervalRate", block=data_block)
-        inflation_interval: int = rp.call("rocketTokenRPL.getInflationIntervalTime", block=data_block)
+        # all reads target the same historical block, so the multicall contract
+        # can't batch them; overlap the round trips in worker threads instead
+        rpl_min, rpl_ratio, actual_borrowed_eth, actual_rpl_stake, inflation_rate, inflation_interval, total_supply = \
+            await asyncio.gather(
+                asyncio.to_thread(rp.call, "rocketDAOProtocolSettingsNode.getMinimumPerMinipoolStake", block=data_block),
+                asyncio.to_thread(rp.call, "rocketNetworkPrices.getRPLPrice", block=data_block),
+                asyncio.to_thread(rp.call, "rocketNodeStaking.getNodeETHMatched", address, block=data_block),
+                asyncio.to_thread(rp.call, "rocketNodeStaking.getNodeRPLStake", address, block=data_block),
+                asyncio.to_thread(rp.call, "rocketTokenRPL.getInflationIntervalRate", block=data_block),
+                asyncio.to_thread(rp.call, "rocketTokenRPL.getInflationIntervalTime", block=data_block),
+                asyncio.to_thread(rp.call, "rocketTokenRPL.totalSupply", block=reward_start_block),
+            )
+        rpl_min: float = solidity.to_float(rpl_min)
+        rpl_ratio = solidity.to_float(rpl_ratio)
+        actual_borrowed_eth = solidity.to_float(actual_borrowed_eth)
+        actual_rpl_stake = solidity.to_float(actual_rpl_stake)
         num_inflation_intervals: int = (rewards.end_time - rewards.start_time) // inflation_interval
-        total_supply: int = rp.call("rocketTokenRPL.totalSupply", block=reward_start_block)
 
         period_inflation: int = total_supply
         for i in range(num_inflation_intervals):
@@ -175,78 +221,100 @@ class Rewards(commands.Cog):
             new_system_weight = rewards.system_weight + weight - base_weight
             return solidity.to_float(0.7 * period_inflation * weight / new_system_weight)
 
-        fig, ax = plt.subplots(figsize=(5, 2.5))
-        ax.grid()
+        def rewards_curve(_stakes: np.ndarray, _borrowed_eth: float) -> np.ndarray:
+            # vectorized rewards_at for the plot sweep: evaluate the piecewise
+            # branches on the whole array instead of one python call per point
+            rpl_value = _stakes * rpl_ratio
+            collateral_ratio = rpl_value / _borrowed_eth
+            log_weight = (13.6137 + 2 * np.log(np.maximum(100 * collateral_ratio - 13, 1e-12))) * _borrowed_eth
+            weight = np.where(
+                collateral_ratio < rpl_min, 0.0,
+                np.where(collateral_ratio <= 0.15, 100 * rpl_value, log_weight)
+            )
+            base_weight = node_weight(actual_rpl_stake, _borrowed_eth)
+            new_system_weight = rewards.system_weight + weight - base_weight
+            return (0.7 * period_inflation / 10 ** 18) * weight / new_system_weight
+
+        if (actual_borrowed_eth <= 0) and (borrowed_eth <= 0):
+            await ctx.send("Empty node. Choose another one or specify the minipool count.")
+            return
 
         one_pct_borrowed = max(actual_borrowed_eth, borrowed_eth) / (rpl_ratio * 100)
 
         x_min = 0
         x_max = max(rpl_stake * 2, actual_rpl_stake * 5, one_pct_borrowed * 20)
-        ax.set_xlim((x_min, x_max))
 
         cur_color, cur_label, cur_ls = "#eb8e55", "current", "solid"
         sim_color, sim_label, sim_ls = "darkred", "simulated", "dashed"
 
-        def draw_reward_curve(_color: str, _label: Optional[str], _line_style: str, _borrowed_eth: float) -> None:
-            step_size = max(1, (x_max - x_min) // 1000)
-            x = np.arange(x_min, x_max, step_size, dtype=int)
-            y = np.array([rewards_at(x, _borrowed_eth) for x in x])
-            ax.plot(x, y, color=_color, linestyle=_line_style, label=_label)
-
-            def plot_point(_pt_color: str, _pt_label: str, _x: int) -> None:
-                label = _pt_label if _label is None else None
-                _y = rewards_at(_x, _borrowed_eth)
-                ax.plot(_x, _y, "o", color=_pt_color, label=label)
-                ax.annotate(
-                    f"{_y:.2f}",
-                    (_x, _y),
-                    textcoords="offset points",
-                    xytext=(5, -10 if _y > 0 else 5),
-                    ha="left"
-                )
-
-            plot_point(cur_color, cur_label, actual_rpl_stake)
-            if rpl_stake > 0:
-                plot_point(sim_color, sim_label, rpl_stake)
-
-        if (actual_borrowed_eth > 0) and (borrowed_eth > 0):
-            draw_reward_curve(cur_color, cur_label, cur_ls, actual_borrowed_eth)
-            draw_reward_curve(sim_color, sim_label, sim_ls, borrowed_eth)
-        elif actual_borrowed_eth > 0:
-            draw_reward_curve(cur_color, None, cur_ls, actual_borrowed_eth)
-        elif borrowed_eth > 0:
-            draw_reward_curve(sim_color, None, sim_ls, borrowed_eth)
-        else:
-            await ctx.send("Empty node. Choose another one or specify the minipool count.")
-            return
-
-        def formatter(_x, _pos) -> str:
-            if _x < 1000:
-                return f"{_x:.0f}"
-            elif _x < 10_000:
-                return f"{(_x / 1000):.1f}k"
-            elif _x < 1_000_000:
-                return f"{(_x / 1000):.0f}k"
+        def render() -> bytes:
+            self._fig.clf()
+            ax = self._fig.add_subplot(111)
+            ax.grid()
+            ax.set_xlim((x_min, x_max))
+
+            def draw_reward_curve(_color: str, _label: Optional[str], _line_style: str, _borrowed_eth: float) -> None:
+                # 500 points is already beyond what the 5-inch figure resolves
+                x = np.linspace(x_min, x_max, 500)
+                y = rewards_curve(x, _borrowed_eth)
+                ax.plot(x, y, color=_color, linestyle=_line_style, label=_label)
+
+                def plot_point(_pt_color: str, _pt_label: str, _x: int) -> None:
+                    label = _pt_label if _label is None else None
+                    _y = rewards_at(_x, _borrowed_eth)
+                    ax.plot(_x, _y, "o", color=_pt_color, label=label)
+                    ax.annotate(
+                        f"{_y:.2f}",
+                        (_x, _y),
+                        textcoords="offset points",
+                        xytext=(5, -10 if _y > 0 else 5),
+                        ha="left"
+                    )
+
+                plot_point(cur_color, cur_label, actual_rpl_stake)
+                if rpl_stake > 0:
+                    plot_point(sim_color, sim_label, rpl_stake)
+
+            if (actual_borrowed_eth > 0) and (borrowed_eth > 0):
+                draw_reward_curve(cur_color, cur_label, cur_ls, actual_borrowed_eth)
+                draw_reward_curve(sim_color, sim_label, sim_ls, borrowed_eth)
+            elif actual_borrowed_eth > 0:
+                draw_reward_curve(cur_color, None, cur_ls, actual_borrowed_eth)
             else:
-                return f"{(_x / 1_000_000):.1f}m"
-
-        ax.set_xlabel("rpl stake")
-        ax.set_ylabel("rewards")
-        ax.xaxis.set_major_formatter(formatter)
-
-        y_min = min(rewards_at(x_min, borrowed_eth), rewards_at(x_min, actual_borrowed_eth))
-        _, y_max = ax.get_ylim()
-        ax.set_ylim((y_min, y_max))
-
-        handles, labels = ax.get_legend_handles_labels()
-        by_label = dict(zip(labels, handles))
-        plt.legend(by_label.values(), by_label.keys(), loc="lower right")
-        fig.tight_layout()
-
-        img = BytesIO()
-        fig.savefig(img, format="png")
-        img.seek(0)
-        plt.close()
+                draw_reward_curve(sim_color, None, sim_ls, borrowed_eth)
+
+            def formatter(_x, _pos) -> str:
+                if _x < 1000:
+                    return f"{_x:.0f}"
+                elif _x < 10_000:
+                    return f"{(_x / 1000):.1f}k"
+                elif _x < 1_000_000:
+                    return f"{(_x / 1000):.0f}k"
+                else:
+                    return f"{(_x / 1_000_000):.1f}m"
+
+            ax.set_xlabel("rpl stake")
+            ax.set_ylabel("rewards")
+            ax.xaxis.set_major_formatter(formatter)
+
+            y_min = min(rewards_at(x_min, borrowed_eth), rewards_at(x_min, actual_borrowed_eth))
+            _, y_max = ax.get_ylim()
+            ax.set_ylim((y_min, y_max))
+
+            handles, labels = ax.get_legend_handles_labels()
+            by_label = dict(zip(labels, handles))
+            ax.legend(by_label.values(), by_label.keys(), loc="lower right")
+            self._fig.tight_layout()
+
+            img = BytesIO()
+            # zlib level 3 encodes plot-like images several times faster than
+            # the default 6 for a barely measurable size increase
+            self._fig.savefig(img, format="png", pil_kwargs={"compress_level": 3, "optimize": False})
+            self._fig.clf()
+            return img.getvalue()
+
+        async with self._render_lock:
+            png = await asyncio.to_thread(render)
 
         sim_info = []
         if rpl_stake > 0:
@@ -262,9 +330,11 @@ class Rewards(commands.Cog):
         embed = self.create_embed(title, rewards)
         embed.set_image(url="attachment://graph.png")
 
-        f = File(img, filename="graph.png")
+        f = File(BytesIO(png), filename="graph.png")
         await ctx.send(embed=embed, files=[f])
-        img.close()
+
+    async def cog_unload(self):
+        await self.session.close()
 
 
 async def setup(bot):
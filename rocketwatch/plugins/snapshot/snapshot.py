@@ -101,7 +101,7 @@ class QueuedSnapshot(commands.Cog):
                 events.append(Response(
                     embed=e,
                     topic="snapshot",
-                    block_number=w3.eth.getBlock("latest").number,
+                    block_number=w3.eth.get_block_number(),
                     event_name=event_name,
                     unique_id=uuid,
                 ))
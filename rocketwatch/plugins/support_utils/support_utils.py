@@ -1,8 +1,11 @@
+import asyncio
+import copy
 import io
 import logging
 from datetime import datetime, timezone
 
 from bson import CodecOptions
+from cachetools import TTLCache
 from discord import app_commands, Interaction, Message, ui, TextStyle, AllowedMentions, ButtonStyle, File, TextChannel, \
     ChannelType, User
 from discord.app_commands import Group, Choice, choices
@@ -10,6 +13,7 @@ from discord.ext.commands import Cog, GroupCog
 from motor.motor_asyncio import AsyncIOMotorClient
 
 from utils.cfg import cfg
+from utils.db import db
 from utils.embeds import Embed
 from utils.get_or_fetch import get_or_fetch_channel
 from utils.reporter import report_error
@@ -18,7 +22,53 @@ log = logging.getLogger("support-threads")
 log.setLevel(cfg["log_level"])
 
 
+# rendered template embeds; writes invalidate explicitly, the short ttl just
+# catches out-of-band edits made directly against the database
+_template_embeds = TTLCache(maxsize=64, ttl=60)
+
+
+# template name list for autocomplete; discord fires a query per keystroke,
+# so this is refreshed at most once a minute instead of once per event
+_template_ids = TTLCache(maxsize=1, ttl=60)
+
+
+def invalidate_template(template_name: str):
+    _template_embeds.pop(template_name, None)
+    _template_ids.clear()
+
+
+async def get_template_ids(db) -> list[str]:
+    if "ids" not in _template_ids:
+        cursor = db.support_bot.find(projection={"_id": 1})
+        _template_ids["ids"] = [c["_id"] async for c in cursor]
+    return _template_ids["ids"]
+
+
+# keep strong references to fire-and-forget writes so they don't get collected
+_pending_writes = set()
+
+
+def write_dump_in_background(db, template_name: str, dump: dict):
+    # the audit dump is not user-facing, no need to block the interaction on it
+    async def _write():
+        try:
+            await db.support_bot_dumps.insert_one(dump)
+        except Exception as e:
+            log.error(e)
+        finally:
+            # refresh the cached embed so its edit footer picks up this dump
+            invalidate_template(template_name)
+
+    task = asyncio.create_task(_write())
+    _pending_writes.add(task)
+    task.add_done_callback(_pending_writes.discard)
+
+
 async def generate_template_embed(db, template_name: str):
+    # always hand out a copy; callers (e.g. core's state message) mutate the
+    # returned embed, which would otherwise leak into later cache hits
+    if template_name in _template_embeds:
+        return copy.deepcopy(_template_embeds[template_name])
     # get the boiler message from the database
     template = await db.support_bot.find_one({'_id': template_name})
     if not template: return None
@@ -32,7 +82,8 @@ async def generate_template_embed(db, template_name: str):
     e = Embed(title=template['title'], description=template['description'])
     if last_edit and template_name != "announcement":
         e.description += f"\n\n*Last Edited by <@{last_edit['author']['id']}> <t:{last_edit['ts'].timestamp():.0f}:R>*"
-    return e
+    _template_embeds[template_name] = e
+    return copy.deepcopy(e)
 
 
 # Define a simple View that gives us a counter button
@@ -88,40 +139,38 @@ class AdminModal(ui.Modal,
         self.add_item(self.description_field)
 
     async def on_submit(self, interaction: Interaction) -> None:
-        # get the data from the db
-        template = await self.db.support_bot.find_one({'_id': self.template_name})
-        # verify that no changes were made while we were editing
-        if template["title"] != self.old_title or template["description"] != self.old_description:
-            # dump the description into a memory file
-            with io.StringIO(self.description_field.value) as f:
-                await interaction.response.edit_message(
-                    embed=Embed(
-                        description="Someone made changes while you were editing. Please try again.\n"
-                                    "Your pending changes have been attached to this message."), view=None)
-                a = await interaction.original_response()
-                await a.add_files(File(fp=f, filename="pending_description_dump.txt"))
+        # only apply the edit if the template still matches what we started from;
+        # the returned document is the pre-update state, which the dump wants anyway
+        template = await self.db.support_bot.find_one_and_update(
+            {"_id": self.template_name, "title": self.old_title, "description": self.old_description},
+            {"$set": {"title": self.title_field.value, "description": self.description_field.value}})
+        if template is None:
+            # dump the description into a memory file, pre-encoded since
+            # discord.File converts text streams to utf-8 anyway
+            f = io.BytesIO(self.description_field.value.encode("utf-8"))
+            await interaction.response.edit_message(
+                embed=Embed(
+                    description="Someone made changes while you were editing. Please try again.\n"
+                                "Your pending changes have been attached to this message."), view=None)
+            a = await interaction.original_response()
+            await a.add_files(File(fp=f, filename="pending_description_dump.txt"))
+            f.close()
             return
-        try:
-            await self.db.support_bot_dumps.insert_one(
-                {
-                    "ts"      : datetime.now(timezone.utc),
-                    "template": self.template_name,
-                    "prev"    : template,
-                    "new"     : {
-                        "title"      : self.title_field.value,
-                        "description": self.description_field.value
-                    },
-                    "author"  : {
-                        "id"  : interaction.user.id,
-                        "name": interaction.user.name
-                    }
-                })
-        except Exception as e:
-            log.error(e)
+        invalidate_template(self.template_name)
+        write_dump_in_background(self.db, self.template_name, {
+            "ts"      : datetime.now(timezone.utc),
+            "template": self.template_name,
+            "prev"    : template,
+            "new"     : {
+                "title"      : self.title_field.value,
+                "description": self.description_field.value
+            },
+            "author"  : {
+                "id"  : interaction.user.id,
+                "name": interaction.user.name
+            }
+        })
 
-        await self.db.support_bot.update_one(
-            {"_id": self.template_name},
-            {"$set": {"title": self.title_field.value, "description": self.description_field.value}})
         embeds = [Embed(), await generate_template_embed(self.db, self.template_name)]
         embeds[0].title = f"View & Edit {self.template_name} template"
         embeds[0].description = f"The following is a preview of the {self.template_name} template.\n" \
@@ -129,14 +178,20 @@ class AdminModal(ui.Modal,
         await interaction.response.edit_message(embeds=embeds, view=AdminView(self.db, self.template_name))
 
 
+# hoisted so the per-interaction permission check skips the cfg dict walks
+_OWNER_ID = cfg["discord.owner.user_id"]
+_SUPPORT_ROLE_IDS = set(cfg["rocketpool.support.role_ids"])
+_SUPPORT_SERVER_ID = cfg["rocketpool.support.server_id"]
+
+
 def has_perms(interaction: Interaction, template_name):
-    if template_name == "announcement" and cfg["discord.owner.user_id"] != interaction.user.id:
+    if interaction.user.id == _OWNER_ID:
+        return True
+    if template_name == "announcement":
         return False
-    return any([
-        any(r.id in cfg["rocketpool.support.role_ids"] for r in interaction.user.roles),
-        cfg["discord.owner.user_id"] == interaction.user.id,
-        interaction.user.guild_permissions.ban_members and interaction.guild.id == cfg["rocketpool.support.server_id"]
-    ])
+    if not _SUPPORT_ROLE_IDS.isdisjoint(r.id for r in interaction.user.roles):
+        return True
+    return interaction.user.guild_permissions.ban_members and interaction.guild.id == _SUPPORT_SERVER_ID
 
 
 async def _use(db, interaction: Interaction, name: str, mention: User | None):
@@ -180,7 +235,7 @@ async def _use(db, interaction: Interaction, name: str, mention: User | None):
 class SupportGlobal(Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb_uri"]).get_database("rocketwatch")
+        self.db = db
 
     @app_commands.command(name="use")
     async def _use_1(self, interaction: Interaction, name: str, mention: User | None):
@@ -193,20 +248,12 @@ class SupportGlobal(Cog):
     @_use_1.autocomplete("name")
     @_use_2.autocomplete("name")
     async def match_template(self, interaction: Interaction, current: str):
+        current = current.lower()
         return [
-            Choice(
-                name=c["_id"],
-                value=c["_id"]
-            ) for c in await self.db.support_bot.find(
-                {
-                    "_id": {
-                        "$regex": current,
-                        "$options": "i",
-                        "$ne"   : "boiler" if interaction.command.name != "edit" else None
-                    }
-                }
-            ).to_list(25)
-        ]
+            Choice(name=name, value=name)
+            for name in await get_template_ids(self.db)
+            if current in name.lower() and (interaction.command.name == "edit" or name != "boiler")
+        ][:25]
 
 
 class SupportUtils(GroupCog, name="support"):
@@ -215,7 +262,7 @@ class SupportUtils(GroupCog, name="support"):
 
     def __init__(self, bot):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb_uri"]).get_database("rocketwatch")
+        self.db = db
         self.ctx_menu = app_commands.ContextMenu(
             name='New Support Thread',
             callback=self.my_cool_context_menu,
@@ -291,8 +338,13 @@ class SupportUtils(GroupCog, name="support"):
                 embed=Embed(title="Error", description="You do not have permission to use this command."), ephemeral=True)
             return
         await interaction.response.defer(ephemeral=True)
-        # check if the template already exists in the db
-        if await self.db.support_bot.find_one({"_id": name}):
+        # create the template, unless one with that name already exists
+        result = await self.db.support_bot.update_one(
+            {"_id": name},
+            {"$setOnInsert": {"title": "Insert Title here", "description": "Insert Description here"}},
+            upsert=True
+        )
+        if result.upserted_id is None:
             await interaction.edit_original_response(
                 embed=Embed(
                     title="Error",
@@ -300,9 +352,7 @@ class SupportUtils(GroupCog, name="support"):
                 ),
             )
             return
-        # create the template in the db
-        await self.db.support_bot.insert_one(
-            {"_id": name, "title": "Insert Title here", "description": "Insert Description here"})
+        invalidate_template(name)
         embeds = [Embed(), await generate_template_embed(self.db, name)]
         embeds[0].title = f"View & Edit {name} template"
         embeds[0].description = f"The following is a preview of the {name} template.\n" \
@@ -349,9 +399,9 @@ class SupportUtils(GroupCog, name="support"):
             )
             return
         await interaction.response.defer(ephemeral=True)
-        # check if the template exists in the db
-        template = await self.db.support_bot.find_one({"_id": name})
-        if not template:
+        # remove the template from the db, reporting whether it was there at all
+        result = await self.db.support_bot.delete_one({"_id": name})
+        if result.deleted_count == 0:
             await interaction.edit_original_response(
                 embed=Embed(
                     title="Error",
@@ -359,8 +409,7 @@ class SupportUtils(GroupCog, name="support"):
                 ),
             )
             return
-        # remove the template from the db
-        await self.db.support_bot.delete_one({"_id": name})
+        invalidate_template(name)
         await interaction.edit_original_response(
             embed=Embed(
                 title="Success",
@@ -420,20 +469,12 @@ class SupportUtils(GroupCog, name="support"):
     @remove.autocomplete("name")
     @use.autocomplete("name")
     async def match_template(self, interaction: Interaction, current: str):
+        current = current.lower()
         return [
-            Choice(
-                name=c["_id"],
-                value=c["_id"]
-            ) for c in await self.db.support_bot.find(
-                {
-                    "_id": {
-                        "$regex": current,
-                        "$options": "i",
-                        "$ne"   : "boiler" if interaction.command.name != "edit" else None
-                    }
-                }
-            ).to_list(25)
-        ]
+            Choice(name=name, value=name)
+            for name in await get_template_ids(self.db)
+            if current in name.lower() and (interaction.command.name == "edit" or name != "boiler")
+        ][:25]
 
 
 async def setup(self):
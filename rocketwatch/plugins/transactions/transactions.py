@@ -1,37 +1,230 @@
 import json
 import logging
-import warnings
 
-import web3.exceptions
 from discord import Object
+from eth_utils import event_abi_to_log_topic, function_abi_to_4byte_selector
+from hexbytes import HexBytes
 from discord.app_commands import guilds
 from discord.ext.commands import Cog, Context, is_owner, hybrid_command
-from web3.datastructures import MutableAttributeDict as aDict
+from web3._utils.abi import get_abi_input_names, get_abi_input_types, map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+from web3.datastructures import AttributeDict, MutableAttributeDict as aDict
 
 from utils import solidity
 from utils.cfg import cfg
 from utils.containers import Response
 from utils.embeds import assemble, prepare_args, el_explorer_url
 from utils.rocketpool import rp
-from utils.shared_w3 import w3
+from utils.shared_w3 import w3, rpc_batch
 from utils.dao import DefaultDAO, ProtocolDAO
 
 log = logging.getLogger("transactions")
 log.setLevel(cfg["log_level"])
 
 
+def _decode_raw_receipt(raw: dict) -> AttributeDict:
+    # shape a raw eth_getBlockReceipts entry like the receipts returned by
+    # w3.eth.get_transaction_receipt, at least for the fields used downstream
+    receipt = dict(raw)
+    for key in ("status", "gasUsed", "cumulativeGasUsed", "effectiveGasPrice", "blockNumber", "transactionIndex", "type"):
+        if receipt.get(key) is not None:
+            receipt[key] = w3.toInt(hexstr=receipt[key])
+    for key in ("transactionHash", "blockHash"):
+        receipt[key] = HexBytes(receipt[key])
+    for key in ("from", "to", "contractAddress"):
+        if receipt.get(key):
+            receipt[key] = w3.toChecksumAddress(receipt[key])
+    logs = []
+    for raw_log in receipt.get("logs", []):
+        entry = dict(raw_log)
+        entry["topics"] = [HexBytes(topic) for topic in entry["topics"]]
+        for key in ("blockNumber", "logIndex", "transactionIndex"):
+            entry[key] = w3.toInt(hexstr=entry[key])
+        entry["transactionHash"] = HexBytes(entry["transactionHash"])
+        entry["blockHash"] = HexBytes(entry["blockHash"])
+        entry["address"] = w3.toChecksumAddress(entry["address"])
+        logs.append(AttributeDict(entry))
+    receipt["logs"] = logs
+    return AttributeDict(receipt)
+
+
+def _decode_raw_block(raw: dict) -> aDict:
+    # decode a raw eth_getBlockBy* response down to the fields the
+    # transaction loop actually touches
+    block = aDict(raw)
+    block.hash = HexBytes(raw["hash"])
+    block.number = w3.toInt(hexstr=raw["number"])
+    block.timestamp = w3.toInt(hexstr=raw["timestamp"])
+    transactions = []
+    for raw_tnx in raw["transactions"]:
+        tnx = aDict(raw_tnx)
+        tnx.hash = HexBytes(raw_tnx["hash"])
+        tnx["from"] = w3.toChecksumAddress(raw_tnx["from"])
+        if raw_tnx.get("to"):
+            tnx.to = w3.toChecksumAddress(raw_tnx["to"])
+        else:
+            # contract creation; the loop checks for a missing `to` key
+            del tnx["to"]
+        tnx.gasPrice = w3.toInt(hexstr=raw_tnx["gasPrice"]) if raw_tnx.get("gasPrice") else 0
+        tnx.blockNumber = block.number
+        tnx.transactionIndex = w3.toInt(hexstr=raw_tnx["transactionIndex"])
+        transactions.append(tnx)
+    block.transactions = transactions
+    return block
+
+
+# per-event embed preprocessing; handlers mutate args in place and return
+# False to suppress the embed entirely
+
+def _embed_odao_disable(args, event, receipt):
+    # oDAO bootstrap doesn't emit an event
+    if not args.confirmDisableBootstrapMode:
+        return False
+
+
+def _embed_pdao_set_delegate(args, event, receipt):
+    args.delegator = receipt["from"]
+    args.delegate = args.get("delegate") or args.get("newDelegate")
+    args.votingPower = solidity.to_float(rp.call("rocketNetworkVoting.getVotingPower", args.delegator, args.blockNumber))
+    if (args.votingPower < 100) or (args.delegate == args.delegator):
+        return False
+
+
+def _embed_failed_deposit(args, event, receipt):
+    args.node = receipt["from"]
+    args.burnedValue = solidity.to_float(event.gasPrice * receipt.gasUsed)
+
+
+def _embed_deposit_pool_queue(args, event, receipt):
+    args.node = receipt["from"]
+    # count the dequeues in this transaction by log topic; no need to
+    # abi-decode every receipt log just to count matches
+    args.count = sum(
+        1 for entry in receipt.logs
+        if entry.address == QueuedTransactions._queue_address
+        and entry.topics and entry.topics[0] == QueuedTransactions._dequeue_topic
+    )
+
+
+def _embed_setting_bool(args, event, receipt):
+    args.value = bool(args.value)
+
+
+# this is duplicated for now because boostrap events are in events.py
+# and there is no good spot in utils for it
+def _embed_pdao_claimer(args, event, receipt):
+    def share_repr(percentage: float) -> str:
+        max_width = 35
+        num_points = round(max_width * percentage / 100)
+        return '*' * num_points
+
+    node_share = args.nodePercent / 10 ** 16
+    pdao_share = args.protocolPercent / 10 ** 16
+    odao_share = args.trustedNodePercent / 10 ** 16
+
+    args.description = '\n'.join([
+        f"Node Operator Share",
+        f"{share_repr(node_share)} {node_share:.1f}%",
+        f"Protocol DAO Share",
+        f"{share_repr(pdao_share)} {pdao_share:.1f}%",
+        f"Oracle DAO Share",
+        f"{share_repr(odao_share)} {odao_share:.1f}%",
+    ])
+
+
+def _embed_pdao_setting_multi(args, event, receipt):
+    args.description = "\n".join(
+        f"`{path}` set to `{QueuedTransactions._PDAO_SETTING_DECODERS.get(setting_type, lambda _: '???')(data)}`"
+        for path, setting_type, data in zip(args.settingPaths, args.types, args.data)
+    )
+
+
+def _embed_sdao_member_kick(args, event, receipt):
+    args.memberAddress = el_explorer_url(args.memberAddress, block=(event.blockNumber - 1))
+
+
+def _embed_sdao_member_replace(args, event, receipt):
+    args.existingMemberAddress = el_explorer_url(args.existingMemberAddress, block=(event.blockNumber - 1))
+
+
+def _embed_sdao_member_kick_multi(args, event, receipt):
+    args.member_list = ", ".join([
+        el_explorer_url(member_address, block=(event.blockNumber - 1))
+        for member_address in args.memberAddresses
+    ])
+
+
+def _embed_odao_network_upgrade(args, event, receipt):
+    if args.type not in QueuedTransactions._UPGRADE_DESCRIPTIONS:
+        raise Exception(f"Network Upgrade of type {args.type} is not known.")
+    args.description = QueuedTransactions._UPGRADE_DESCRIPTIONS[args.type].format(name=args.name)
+
+
+_EXACT_EMBED_HANDLERS = {
+    "pdao_claimer"                 : _embed_pdao_claimer,
+    "pdao_setting_multi"           : _embed_pdao_setting_multi,
+    "sdao_member_kick"             : _embed_sdao_member_kick,
+    "sdao_member_replace"          : _embed_sdao_member_replace,
+    "sdao_member_kick_multi"       : _embed_sdao_member_kick_multi,
+    "bootstrap_odao_network_upgrade": _embed_odao_network_upgrade,
+}
+
+
+def _resolve_embed_handler(event_name, function_name):
+    # same precedence as the old if/elif chain in create_embed, but evaluated
+    # once per event name at init instead of per transaction
+    if "odao_disable" in event_name:
+        return _embed_odao_disable
+    if event_name == "pdao_set_delegate":
+        return _embed_pdao_set_delegate
+    if "failed_deposit" in event_name:
+        return _embed_failed_deposit
+    if "deposit_pool_queue" in event_name:
+        return _embed_deposit_pool_queue
+    if "SettingBool" in function_name:
+        return _embed_setting_bool
+    return _EXACT_EMBED_HANDLERS.get(event_name)
+
+
 class QueuedTransactions(Cog):
+    _UPGRADE_DESCRIPTIONS = {
+        "addContract"    : "Contract `{name}` has been added!",
+        "upgradeContract": "Contract `{name}` has been upgraded!",
+        "addABI"         : "[ABI](https://ethereum.org/en/glossary/#abi) for Contract `{name}` has been added!",
+        "upgradeABI"     : "[ABI](https://ethereum.org/en/glossary/#abi) of Contract `{name}` has been upgraded!",
+    }
+    # SettingType.UINT256, SettingType.BOOL, SettingType.ADDRESS
+    # the data entries are 32-byte abi-encoded words, so decode them directly
+    # instead of going through the validating (and allocating) w3 helpers
+    _PDAO_SETTING_DECODERS = {
+        0: lambda data: int.from_bytes(data, "big"),
+        1: lambda data: bool(data[-1]),
+        2: lambda data: w3.toChecksumAddress(data[-20:]),
+    }
+    # set during __init__; used to count dequeue logs without decoding them
+    _queue_address = None
+    _dequeue_topic = None
+    # event name -> preprocessing handler, resolved once during __init__ so
+    # create_embed does a single dict lookup instead of the substring chain
+    _EVENT_HANDLERS = {}
+
     def __init__(self, bot):
         self.bot = bot
         self.state = "INIT"
-        self.addresses = []
         self.internal_function_mapping = {}
+        # (contract address, 4-byte selector) ->
+        # (contract name, event name, function name, input types, input names)
+        self.selector_mapping = {}
 
         self.block_event = w3.eth.filter("latest")
+        # per-run {block hash: {tx hash: receipt}} cache filled block-wise
+        self._receipts = {}
+        self._block_receipts_supported = True
 
         with open("./plugins/transactions/functions.json") as f:
             mapped_events = json.load(f)
 
+        addresses = []
         for contract_name, event_mapping in mapped_events.items():
             try:
                 address = rp.get_address_by_name(contract_name)
@@ -39,9 +232,37 @@ class QueuedTransactions(Cog):
                 log.exception(e)
                 log.error(f"Could not find address for contract {contract_name}")
                 continue
-            self.addresses.append(address)
+            addresses.append(address)
             self.internal_function_mapping[contract_name] = event_mapping
 
+            contract = rp.get_contract_by_name(contract_name)
+            for fn_abi in contract.abi:
+                if fn_abi.get("type") == "function" and fn_abi["name"] in event_mapping:
+                    selector = function_abi_to_4byte_selector(fn_abi)
+                    self.selector_mapping[(address, selector)] = (
+                        contract_name,
+                        event_mapping[fn_abi["name"]],
+                        fn_abi["name"],
+                        get_abi_input_types(fn_abi),
+                        get_abi_input_names(fn_abi)
+                    )
+
+        # frozenset for O(1) membership tests in the per-transaction hot path
+        self.addresses = frozenset(addresses)
+
+        # keyed by (event name, function name) since several functions share
+        # one event name but only the SettingBool variants need bool coercion
+        QueuedTransactions._EVENT_HANDLERS = {
+            (event_name, function): _resolve_embed_handler(event_name, function)
+            for _, event_name, function, _, _ in self.selector_mapping.values()
+        }
+
+        queue_contract = rp.get_contract_by_name("rocketMinipoolQueue")
+        QueuedTransactions._queue_address = queue_contract.address
+        QueuedTransactions._dequeue_topic = HexBytes(
+            event_abi_to_log_topic(queue_contract.events.MinipoolDequeued().abi)
+        )
+
     @hybrid_command()
     @guilds(Object(id=cfg["discord.owner.server_id"]))
     @is_owner()
@@ -84,8 +305,29 @@ class QueuedTransactions(Cog):
         for response in responses:
             await ctx.send(embed=response.embed)
 
+    def _get_block_receipts(self, block) -> dict:
+        # one eth_getBlockReceipts call covers every receipt lookup in the block
+        if block.hash not in self._receipts:
+            receipts = {}
+            if self._block_receipts_supported:
+                resp = w3.provider.make_request("eth_getBlockReceipts", [block.hash.hex()])
+                if resp.get("result"):
+                    receipts = {HexBytes(r["transactionHash"]): _decode_raw_receipt(r) for r in resp["result"]}
+                else:
+                    log.warning("eth_getBlockReceipts unavailable, falling back to per-transaction receipts")
+                    self._block_receipts_supported = False
+            self._receipts[block.hash] = receipts
+        return self._receipts[block.hash]
+
+    def _get_receipt(self, block, tnx):
+        receipts = self._get_block_receipts(block)
+        if (receipt := receipts.get(tnx.hash)) is None:
+            receipt = w3.eth.get_transaction_receipt(tnx.hash)
+            receipts[tnx.hash] = receipt
+        return receipt
+
     @staticmethod
-    def create_embed(event_name, event):
+    def create_embed(event_name, event, receipt=None):
         # prepare args
         args = aDict(event.args)
 
@@ -96,90 +338,18 @@ class QueuedTransactions(Cog):
         args.transactionHash = event.hash.hex()
         args.blockNumber = event.blockNumber
 
-        receipt = w3.eth.get_transaction_receipt(args.transactionHash)
+        if receipt is None:
+            receipt = w3.eth.get_transaction_receipt(args.transactionHash)
 
-        # oDAO bootstrap doesn't emit an event
-        if "odao_disable" in event_name and not args.confirmDisableBootstrapMode:
+        try:
+            handler = QueuedTransactions._EVENT_HANDLERS[(event_name, args.function_name)]
+        except KeyError:
+            # replayed events (debug commands) can carry names that were not
+            # seen during __init__; resolve and remember them the same way
+            handler = QueuedTransactions._EVENT_HANDLERS[(event_name, args.function_name)] = \
+                _resolve_embed_handler(event_name, args.function_name)
+        if handler is not None and handler(args, event, receipt) is False:
             return None
-        elif event_name == "pdao_set_delegate":
-            args.delegator = receipt["from"]
-            args.delegate = args.get("delegate") or args.get("newDelegate")
-            args.votingPower = solidity.to_float(rp.call("rocketNetworkVoting.getVotingPower", args.delegator, args.blockNumber))
-            if (args.votingPower < 100) or (args.delegate == args.delegator):
-                return None
-        elif "failed_deposit" in event_name:
-            args.node = receipt["from"]
-            args.burnedValue = solidity.to_float(event.gasPrice * receipt.gasUsed)
-        elif "deposit_pool_queue" in event_name:
-            args.node = receipt["from"]
-            event = rp.get_contract_by_name("rocketMinipoolQueue").events.MinipoolDequeued()
-            # get the amount of dequeues that happened in this transaction using the event logs
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                processed_logs = event.processReceipt(receipt)
-            args.count = len(processed_logs)
-        elif "SettingBool" in args.function_name:
-            args.value = bool(args.value)
-        # this is duplicated for now because boostrap events are in events.py
-        # and there is no good spot in utils for it
-        elif event_name == "pdao_claimer":
-            def share_repr(percentage: float) -> str:
-                max_width = 35
-                num_points = round(max_width * percentage / 100)
-                return '*' * num_points
-
-            node_share = args.nodePercent / 10 ** 16
-            pdao_share = args.protocolPercent / 10 ** 16
-            odao_share = args.trustedNodePercent / 10 ** 16
-
-            args.description = '\n'.join([
-                f"Node Operator Share",
-                f"{share_repr(node_share)} {node_share:.1f}%",
-                f"Protocol DAO Share",
-                f"{share_repr(pdao_share)} {pdao_share:.1f}%",
-                f"Oracle DAO Share",
-                f"{share_repr(odao_share)} {odao_share:.1f}%",
-            ])
-        elif event_name == "pdao_setting_multi":
-            description_parts = []
-            for i in range(len(args.settingContractNames)):
-                value_raw = args.data[i]
-                match args.types[i]:
-                    case 0:
-                        # SettingType.UINT256
-                        value = w3.toInt(value_raw)
-                    case 1:
-                        # SettingType.BOOL
-                        value = bool(value_raw)
-                    case 2:
-                        # SettingType.ADDRESS
-                        value = w3.toChecksumAddress(value_raw)
-                    case _:
-                        value = "???"
-                description_parts.append(
-                    f"`{args.settingPaths[i]}` set to `{value}`"
-                )
-            args.description = "\n".join(description_parts)
-        elif event_name == "sdao_member_kick":
-            args.memberAddress = el_explorer_url(args.memberAddress, block=(event.blockNumber - 1))
-        elif event_name == "sdao_member_replace":
-            args.existingMemberAddress = el_explorer_url(args.existingMemberAddress, block=(event.blockNumber - 1))
-        elif event_name == "sdao_member_kick_multi":
-            args.member_list = ", ".join([
-                el_explorer_url(member_address, block=(event.blockNumber - 1))
-                for member_address in args.memberAddresses
-            ])
-        elif event_name == "bootstrap_odao_network_upgrade":
-            if args.type == "addContract":
-                args.description = f"Contract `{args.name}` has been added!"
-            elif args.type == "upgradeContract":
-                args.description = f"Contract `{args.name}` has been upgraded!"
-            elif args.type == "addABI":
-                args.description = f"[ABI](https://ethereum.org/en/glossary/#abi) for Contract `{args.name}` has been added!"
-            elif args.type == "upgradeABI":
-                args.description = f"[ABI](https://ethereum.org/en/glossary/#abi) of Contract `{args.name}` has been upgraded!"
-            else:
-                raise Exception(f"Network Upgrade of type {args.type} is not known.")
 
         args = prepare_args(args)
         return assemble(args)
@@ -188,31 +358,42 @@ class QueuedTransactions(Cog):
         if contract_address not in self.addresses:
             return []
 
-        contract_name = rp.get_name_by_address(contract_address)
-        # get receipt and check if the transaction reverted using status attribute
-        receipt = w3.eth.get_transaction_receipt(tnx.hash)
-        if contract_name == "rocketNodeDeposit" and receipt.status:
-            log.info(f"Skipping successful node deposit {tnx.hash.hex()}")
-            return []
-
-        if contract_name != "rocketNodeDeposit" and not receipt.status:
-            log.info(f"Skipping reverted transaction {tnx.hash.hex()}")
+        # cheap selector check before any ABI decode or RPC work; the mapping
+        # carries the input types, so no per-transaction ABI scan is needed
+        fn_input = HexBytes(fn_input)
+        if (mapped := self.selector_mapping.get((contract_address, bytes(fn_input[:4])))) is None:
             return []
+        contract_name, event_name, function, input_types, input_names = mapped
 
         try:
-            contract = rp.get_contract_by_address(contract_address)
-            decoded = contract.decode_function_input(fn_input)
-        except ValueError:
+            values = w3.codec.decode_abi(input_types, bytes(fn_input[4:]))
+        except Exception:
             log.error(f"Skipping transaction {tnx.hash.hex()} as it has invalid input")
             return []
-        log.debug(decoded)
+        values = map_abi_data(BASE_RETURN_NORMALIZERS, input_types, values)
+        decoded_args = dict(zip(input_names, values))
+        log.debug(decoded_args)
 
-        function = decoded[0].function_identifier
-        if (event_name := self.internal_function_mapping[contract_name].get(function)) is None:
+        # only fetch receipts once the transaction is known to be interesting
+        # check if the transaction reverted using its status attribute
+        receipt = self._get_receipt(block, tnx)
+        if contract_name == "rocketNodeDeposit" and receipt.status:
+            log.info(f"Skipping successful node deposit {tnx.hash.hex()}")
             return []
 
-        event = aDict(tnx)
-        event.args = {arg.lstrip("_"): value for arg, value in decoded[1].items()}
+        if contract_name != "rocketNodeDeposit" and not receipt.status:
+            log.info(f"Skipping reverted transaction {tnx.hash.hex()}")
+            return []
+
+        # only carry the transaction fields used downstream instead of cloning the full tx
+        event = aDict({
+            "hash"            : tnx.hash,
+            "from"            : tnx["from"],
+            "gasPrice"        : tnx.gasPrice,
+            "blockNumber"     : tnx.blockNumber,
+            "transactionIndex": tnx.transactionIndex
+        })
+        event.args = {arg.lstrip("_"): value for arg, value in decoded_args.items()}
         event.args["timestamp"] = block.timestamp
         event.args["function_name"] = function
         if not receipt.status:
@@ -250,7 +431,7 @@ class QueuedTransactions(Cog):
             dao_address = dao.contract.address
             responses = self.process_transaction(block, tnx, dao_address, payload)
 
-        if (embed := self.create_embed(event_name, event)) is None:
+        if (embed := self.create_embed(event_name, event, receipt)) is None:
             return responses
 
         response = Response(
@@ -266,31 +447,58 @@ class QueuedTransactions(Cog):
 
     def run_loop(self):
         if self.state == "RUNNING":
-            log.error("Transaction plugin was interrupted while running. Re-initializing...")
-            self.__init__(self.bot)
+            # a previous run was interrupted; resetting to INIT makes the next
+            # check replay the look-back window, which covers anything the
+            # crashed run missed without rebuilding the selector mapping or
+            # clobbering the block filter
+            log.error("Transaction plugin was interrupted while running. Recovering with a full check...")
+            self.state = "INIT"
         return self.check_for_new_transactions()
 
     def check_for_new_transactions(self):
         log.info("Checking for new Transaction Commands")
         payload = []
+        self._receipts.clear()
 
         do_full_check = self.state == "INIT"
         self.state = "RUNNING"
         if do_full_check:
             log.info("Doing full check")
-            latest_block = w3.eth.getBlock("latest").number
+            latest_block = w3.eth.get_block_number()
             blocks = list(range(latest_block - cfg["core.look_back_distance"], latest_block))
         else:
-            blocks = list(self.block_event.get_new_entries())
-
-        for block_hash in blocks:
-            log.debug(f"Checking block: {block_hash}")
             try:
-                block = w3.eth.get_block(block_hash, full_transactions=True)
-            except web3.exceptions.BlockNotFound:
-                log.error(f"Skipping block {block_hash} as it can't be found")
-                continue
-
+                blocks = list(self.block_event.get_new_entries())
+            except ValueError:
+                # the node-side filter expired; recreate it and fall back to the
+                # look-back window instead of reinitializing the whole cog
+                log.warning("Block filter expired, recreating it")
+                self.block_event = w3.eth.filter("latest")
+                latest_block = w3.eth.get_block_number()
+                blocks = list(range(latest_block - cfg["core.look_back_distance"], latest_block))
+
+        # nothing new since the last run; skip the block fetching entirely
+        if not blocks:
+            self.state = "OK"
+            return payload
+
+        # fetch all block bodies in a few JSON-RPC batch requests instead of
+        # one round-trip per block; chunked to stay below provider batch caps
+        full_blocks = []
+        for i in range(0, len(blocks), 200):
+            chunk = blocks[i:i + 200]
+            calls = [
+                ("eth_getBlockByNumber", [hex(block_id), True]) if isinstance(block_id, int)
+                else ("eth_getBlockByHash", [block_id.hex(), True])
+                for block_id in chunk
+            ]
+            for block_id, raw_block in zip(chunk, rpc_batch(w3, calls)):
+                if raw_block is None:
+                    log.error(f"Skipping block {block_id} as it can't be found")
+                    continue
+                full_blocks.append(_decode_raw_block(raw_block))
+
+        for block in full_blocks:
             for tnx in block.transactions:
                 if "to" in tnx:
                     payload.extend(self.process_transaction(block, tnx, tnx.to, tnx.input))
@@ -0,0 +1,46 @@
+import math
+
+from hashlib import blake2b
+
+
+class APBF:
+    """
+    Age-partitioned Bloom filter for bounded-memory deduplication.
+
+    Keys are inserted into the newest of `generations` Bloom slices; once that
+    slice has seen its share of `capacity` keys, the oldest slice is dropped and
+    a fresh one takes its place. Membership checks all live slices, so a key is
+    remembered for at least `capacity` further inserts before it can age out.
+    False positives (at most `fp_rate`) are acceptable as the goal is to
+    deduplicate; false negatives only happen for keys older than the window.
+    """
+
+    def __init__(self, capacity: int = 8192, fp_rate: float = 1e-4, generations: int = 10, hashes: int = 4):
+        self.generation_capacity = math.ceil(capacity / generations)
+        self.num_hashes = hashes
+        # size each slice such that the false-positive rate of the union of all
+        # generations stays below fp_rate, given the fixed number of hashes
+        slice_fp = fp_rate / generations
+        self.num_bits = math.ceil(-hashes * self.generation_capacity / math.log(1 - slice_fp ** (1 / hashes)))
+        # python ints as bitsets, oldest slice first
+        self.slices = [0] * generations
+        self.counts = [0] * generations
+
+    def _bit_positions(self, key: str) -> list[int]:
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        positions = self._bit_positions(key)
+        return any(all((s >> pos) & 1 for pos in positions) for s in self.slices)
+
+    def add(self, key: str) -> None:
+        if self.counts[-1] >= self.generation_capacity:
+            # rotate: age out the oldest slice to make room for a fresh one
+            self.slices = self.slices[1:] + [0]
+            self.counts = self.counts[1:] + [0]
+        for pos in self._bit_positions(key):
+            self.slices[-1] |= 1 << pos
+        self.counts[-1] += 1
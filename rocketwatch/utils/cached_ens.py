@@ -1,6 +1,6 @@
 import logging
 
-from cachetools.func import ttl_cache
+from cachetools import TTLCache
 from ens import ENS
 
 from utils.cfg import cfg
@@ -11,15 +11,27 @@ log.setLevel(cfg["log_level"])
 
 
 class CachedEns:
+    # class-level so the cache survives cog reinitialization; ttl_cache on the
+    # methods would have keyed every entry on the instance as well, keeping
+    # stale instances alive and splitting the cache after each reload
+    NAME_CACHE = TTLCache(maxsize=4096, ttl=3600)
+    ADDRESS_CACHE = TTLCache(maxsize=4096, ttl=3600)
+
     def __init__(self):
         self.ens = ENS.fromWeb3(mainnet_w3)
 
-    @ttl_cache(ttl=300)
     def get_name(self, address):
+        if address in self.NAME_CACHE:
+            return self.NAME_CACHE[address]
         log.debug(f"retrieving ens name for {address}")
-        return self.ens.name(address)
+        name = self.ens.name(address)
+        self.NAME_CACHE[address] = name
+        return name
 
-    @ttl_cache(ttl=300)
     def resolve_name(self, name):
+        if name in self.ADDRESS_CACHE:
+            return self.ADDRESS_CACHE[name]
         log.debug(f"resolving ens name {name}")
-        return self.ens.resolve(name)
+        address = self.ens.resolve(name)
+        self.ADDRESS_CACHE[name] = address
+        return address
@@ -1,12 +1,17 @@
-import math
 import pickle
 from datetime import datetime
+from functools import lru_cache
 
 from utils.cfg import cfg
 
 
-def calc_score(block_number, transaction_index=999, event_index=999):
-    return block_number + (transaction_index * 10 ** -3) + (event_index * 10 ** -6)
+@lru_cache(maxsize=None)
+def _channel_for_event(event_name: str) -> int:
+    # select channel dynamically from config based on event_name prefix;
+    # memoized since the prefix scan is O(channels) and the config is static
+    channels = cfg["discord.channels"]
+    channel_candidates = [value for key, value in channels.items() if event_name.startswith(key)]
+    return channel_candidates[0] if channel_candidates else channels['default']
 
 
 class Response:
@@ -30,10 +35,7 @@ class Response:
         self.score = self.block_number * 10 ** 9 + self.transaction_index * 10 ** 5 + self.event_index
         if self.embed.footer and self.embed.footer.text:
             self.embed.set_footer_parts([f"score: {self.score}"])
-        # select channel dynamically from config based on event_name prefix
-        channels = cfg["discord.channels"]
-        channel_candidates = [value for key, value in channels.items() if event_name.startswith(key)]
-        self.channel_id = channel_candidates[0] if channel_candidates else channels['default']
+        self.channel_id = _channel_for_event(event_name)
 
     def __bool__(self):
         return bool(self.embed)
@@ -5,8 +5,6 @@ from enum import IntEnum
 from typing import Union
 from abc import ABC, abstractmethod
 
-import termplotlib as tpl
-
 from utils import solidity
 from utils.cfg import cfg
 from utils.rocketpool import rp
@@ -16,27 +14,50 @@ log = logging.getLogger("dao")
 log.setLevel(cfg["log_level"])
 
 
+def render_barh(values: list[int], labels: list[str], max_width: int = 20) -> list[str]:
+    # render a horizontal bar chart as text, one row per value
+    label_width = max(map(len, labels))
+    scale = max_width / max(*values, 1)
+    return [
+        f"{label : <{label_width}}  {'█' * round(value * scale)} {value}"
+        for value, label in zip(values, labels)
+    ]
+
+
 class DAO(ABC):
     def __init__(self, contract_name):
         self.contract_name = contract_name
         self.contract = rp.get_contract_by_name(contract_name)
 
+    # the only proposal fields that can still change once a proposal exists
+    _VOTE_FIELDS: frozenset[str] = frozenset()
+
     @staticmethod
     @abstractmethod
-    def fetch_proposal(proposal_id: int) -> dict:
+    def fetch_proposals(proposal_ids: list[int]) -> list[dict]:
         pass
 
+    @staticmethod
+    @abstractmethod
+    def fetch_proposal_votes(proposal_ids: list[int]) -> list[dict]:
+        pass
+
+    @classmethod
+    def fetch_proposal(cls, proposal_id: int) -> dict:
+        return cls.fetch_proposals([proposal_id])[0]
+
     @abstractmethod
     def _build_vote_graph(self, proposal: dict) -> str:
         pass
 
+    _MESSAGE_MAX_LENGTH = 150
+    _MESSAGE_TRUNC_LENGTH = _MESSAGE_MAX_LENGTH - len("...")
+
     @staticmethod
     def sanitize(message: str) -> str:
-        max_length = 150
-        suffix = "..."
-        if len(message) > max_length:
-            message = message[:max_length - len(suffix)] + suffix
-        return message
+        if len(message) <= DAO._MESSAGE_MAX_LENGTH:
+            return message
+        return message[:DAO._MESSAGE_TRUNC_LENGTH] + "..."
 
     def build_proposal_body(
             self,
@@ -45,23 +66,29 @@ class DAO(ABC):
             include_payload=True,
             include_votes=True
     ) -> str:
-        body_repr = f"Description:\n{self.sanitize(proposal['message'])}"
+        if not (message := proposal.get("message_clean")):
+            # memoize on the dict so re-renders reuse the sanitized copy
+            message = proposal["message_clean"] = self.sanitize(proposal["message"])
+        body_repr = f"Description:\n{message}"
 
         if include_proposer:
             body_repr += f"\n\nProposed by:\n{proposal['proposer']}"
 
         if include_payload:
-            payload = proposal["payload"]
-            try:
-                decoded = self.contract.decode_function_input(payload)
-                function_name = decoded[0].function_identifier
-                args = [f"  {arg} = {value}" for arg, value in decoded[1].items()]
-                payload_str = f"{function_name}(\n" + "\n".join(args) + "\n)"
-                body_repr += f"\n\nPayload:\n{payload_str}"
-            except Exception as e:
-                # if this goes wrong, just use the raw payload
-                log.exception("Failed to decode proposal payload")
-                body_repr += f"\n\nRaw Payload (failed to decode):\n{payload.hex()}"
+            if not (payload_str := proposal.get("payload_str")):
+                payload = proposal["payload"]
+                try:
+                    decoded = self.contract.decode_function_input(payload)
+                    function_name = decoded[0].function_identifier
+                    args = [f"  {arg} = {value}" for arg, value in decoded[1].items()]
+                    payload_str = f"Payload:\n{function_name}(\n" + "\n".join(args) + "\n)"
+                except Exception as e:
+                    # if this goes wrong, just use the raw payload
+                    log.exception("Failed to decode proposal payload")
+                    payload_str = f"Raw Payload (failed to decode):\n{payload.hex()}"
+                # memoize on the dict so re-renders skip the ABI decode
+                proposal["payload_str"] = payload_str
+            body_repr += f"\n\n{payload_str}"
 
         if include_votes:
             body_repr += f"\n\nVotes:\n{self._build_vote_graph(proposal)}"
@@ -70,6 +97,8 @@ class DAO(ABC):
 
 
 class DefaultDAO(DAO):
+    _VOTE_FIELDS = frozenset({"votes_for", "votes_against"})
+
     def __init__(self, contract_name: str):
         if contract_name == "rocketDAONodeTrustedProposals":
             self.display_name = "oDAO"
@@ -89,49 +118,74 @@ class DefaultDAO(DAO):
         Executed = 6
 
     @staticmethod
-    def fetch_proposal(proposal_id: int) -> dict:
+    def fetch_proposals(proposal_ids: list[int]) -> list[dict]:
         proposal_contract = rp.get_contract_by_name("rocketDAOProposal")
-        # map results of functions calls to function name
-        metadata_calls: dict[str, Union[str, bytes, int]] = {
-            res.function_name: res.results[0] for res in rp.multicall.aggregate([
-                proposal_contract.functions.getProposer(proposal_id),
-                proposal_contract.functions.getMessage(proposal_id),
-                proposal_contract.functions.getPayload(proposal_id),
-                proposal_contract.functions.getCreated(proposal_id),
-                proposal_contract.functions.getStart(proposal_id),
-                proposal_contract.functions.getEnd(proposal_id),
-                proposal_contract.functions.getExpires(proposal_id),
-                proposal_contract.functions.getVotesFor(proposal_id),
-                proposal_contract.functions.getVotesAgainst(proposal_id),
-                proposal_contract.functions.getVotesRequired(proposal_id)
-            ]).results
-        }
-        return {
-            "id": proposal_id,
-            "proposer": metadata_calls["getProposer"],
-            "message": metadata_calls["getMessage"],
-            "payload": metadata_calls["getPayload"],
-            "created": metadata_calls["getCreated"],
-            "start": metadata_calls["getStart"],
-            "end": metadata_calls["getEnd"],
-            "expires": metadata_calls["getExpires"],
-            "votes_for": solidity.to_int(metadata_calls["getVotesFor"]),
-            "votes_against": solidity.to_int(metadata_calls["getVotesAgainst"]),
-            "votes_required": solidity.to_float(metadata_calls["getVotesRequired"])
-        }
+        getters = (
+            proposal_contract.functions.getProposer,
+            proposal_contract.functions.getMessage,
+            proposal_contract.functions.getPayload,
+            proposal_contract.functions.getCreated,
+            proposal_contract.functions.getStart,
+            proposal_contract.functions.getEnd,
+            proposal_contract.functions.getExpires,
+            proposal_contract.functions.getVotesFor,
+            proposal_contract.functions.getVotesAgainst,
+            proposal_contract.functions.getVotesRequired
+        )
+        # fetch all proposals in a single multicall, results stay in call order
+        results = rp.multicall.aggregate([
+            getter(proposal_id) for proposal_id in proposal_ids for getter in getters
+        ]).results if proposal_ids else []
+
+        proposals = []
+        for i, proposal_id in enumerate(proposal_ids):
+            # map results of functions calls to function name
+            metadata_calls: dict[str, Union[str, bytes, int]] = {
+                res.function_name: res.results[0]
+                for res in results[(i * len(getters)):((i + 1) * len(getters))]
+            }
+            proposals.append({
+                "id": proposal_id,
+                "proposer": metadata_calls["getProposer"],
+                "message": metadata_calls["getMessage"],
+                "payload": metadata_calls["getPayload"],
+                "created": metadata_calls["getCreated"],
+                "start": metadata_calls["getStart"],
+                "end": metadata_calls["getEnd"],
+                "expires": metadata_calls["getExpires"],
+                "votes_for": solidity.to_int(metadata_calls["getVotesFor"]),
+                "votes_against": solidity.to_int(metadata_calls["getVotesAgainst"]),
+                "votes_required": solidity.to_float(metadata_calls["getVotesRequired"])
+            })
+        return proposals
+
+    @staticmethod
+    def fetch_proposal_votes(proposal_ids: list[int]) -> list[dict]:
+        proposal_contract = rp.get_contract_by_name("rocketDAOProposal")
+        getters = (
+            proposal_contract.functions.getVotesFor,
+            proposal_contract.functions.getVotesAgainst
+        )
+        results = rp.multicall.aggregate([
+            getter(proposal_id) for proposal_id in proposal_ids for getter in getters
+        ]).results if proposal_ids else []
+        return [
+            {
+                "votes_for": solidity.to_int(results[i * len(getters)].results[0]),
+                "votes_against": solidity.to_int(results[i * len(getters) + 1].results[0])
+            } for i in range(len(proposal_ids))
+        ]
 
     def _build_vote_graph(self, proposal: dict) -> str:
         votes_for = proposal["votes_for"]
         votes_against = proposal["votes_against"]
         votes_required = math.ceil(proposal["votes_required"])
 
-        graph = tpl.figure()
-        graph.barh(
+        graph_bars = render_barh(
             [votes_for, votes_against, max([votes_for, votes_against, votes_required])],
             ["For", "Against", ""],
             max_width=20
         )
-        graph_bars = graph.get_string().split("\n")
         quorum_pct = round(100 * max(votes_for, votes_against) / votes_required)
         return (
             f"{graph_bars[0] : <{len(graph_bars[2])}}{'▏' if votes_for >= votes_against else ''}\n"
@@ -141,6 +195,8 @@ class DefaultDAO(DAO):
 
 
 class ProtocolDAO(DAO):
+    _VOTE_FIELDS = frozenset({"votes_for", "votes_against", "votes_veto", "votes_abstain"})
+
     def __init__(self):
         super().__init__("rocketDAOProtocolProposals")
 
@@ -157,50 +213,80 @@ class ProtocolDAO(DAO):
         Executed = 9
 
     @staticmethod
-    def fetch_proposal(proposal_id: int) -> dict:
+    def fetch_proposals(proposal_ids: list[int]) -> list[dict]:
+        proposal_contract = rp.get_contract_by_name("rocketDAOProtocolProposal")
+        getters = (
+            proposal_contract.functions.getProposer,
+            proposal_contract.functions.getMessage,
+            proposal_contract.functions.getPayload,
+            proposal_contract.functions.getCreated,
+            proposal_contract.functions.getStart,
+            proposal_contract.functions.getPhase1End,
+            proposal_contract.functions.getPhase2End,
+            proposal_contract.functions.getExpires,
+            proposal_contract.functions.getVotingPowerFor,
+            proposal_contract.functions.getVotingPowerAgainst,
+            proposal_contract.functions.getVotingPowerVeto,
+            proposal_contract.functions.getVotingPowerAbstained,
+            proposal_contract.functions.getVotingPowerRequired,
+            proposal_contract.functions.getVetoQuorum
+        )
+        # fetch all proposals in a single multicall, results stay in call order
+        results = rp.multicall.aggregate([
+            getter(proposal_id) for proposal_id in proposal_ids for getter in getters
+        ]).results if proposal_ids else []
+
+        proposals = []
+        for i, proposal_id in enumerate(proposal_ids):
+            # map results of functions calls to function name
+            metadata_calls: dict[str, Union[str, bytes, int]] = {
+                res.function_name: res.results[0]
+                for res in results[(i * len(getters)):((i + 1) * len(getters))]
+            }
+            proposals.append({
+                "id": proposal_id,
+                "proposer": metadata_calls["getProposer"],
+                "message": metadata_calls["getMessage"],
+                "payload": metadata_calls["getPayload"],
+                "created": metadata_calls["getCreated"],
+                "start": metadata_calls["getStart"],
+                "end_phase1": metadata_calls["getPhase1End"],
+                "end_phase2": metadata_calls["getPhase2End"],
+                "expires": metadata_calls["getExpires"],
+                "votes_for": solidity.to_float(metadata_calls["getVotingPowerFor"]),
+                "votes_against": solidity.to_float(metadata_calls["getVotingPowerAgainst"]),
+                "votes_veto": solidity.to_float(metadata_calls["getVotingPowerVeto"]),
+                "votes_abstain": solidity.to_float(metadata_calls["getVotingPowerAbstained"]),
+                "quorum": solidity.to_float(metadata_calls["getVotingPowerRequired"]),
+                "veto_quorum": solidity.to_float(metadata_calls["getVetoQuorum"])
+            })
+        return proposals
+
+    @staticmethod
+    def fetch_proposal_votes(proposal_ids: list[int]) -> list[dict]:
         proposal_contract = rp.get_contract_by_name("rocketDAOProtocolProposal")
-        # map results of functions calls to function name
-        metadata_calls: dict[str, Union[str, bytes, int]] = {
-            res.function_name: res.results[0] for res in rp.multicall.aggregate([
-                proposal_contract.functions.getProposer(proposal_id),
-                proposal_contract.functions.getMessage(proposal_id),
-                proposal_contract.functions.getPayload(proposal_id),
-                proposal_contract.functions.getCreated(proposal_id),
-                proposal_contract.functions.getStart(proposal_id),
-                proposal_contract.functions.getPhase1End(proposal_id),
-                proposal_contract.functions.getPhase2End(proposal_id),
-                proposal_contract.functions.getExpires(proposal_id),
-                proposal_contract.functions.getVotingPowerFor(proposal_id),
-                proposal_contract.functions.getVotingPowerAgainst(proposal_id),
-                proposal_contract.functions.getVotingPowerVeto(proposal_id),
-                proposal_contract.functions.getVotingPowerAbstained(proposal_id),
-                proposal_contract.functions.getVotingPowerRequired(proposal_id),
-                proposal_contract.functions.getVetoQuorum(proposal_id)
-            ]).results
-        }
-        return {
-            "id": proposal_id,
-            "proposer": metadata_calls["getProposer"],
-            "message": metadata_calls["getMessage"],
-            "payload": metadata_calls["getPayload"],
-            "created": metadata_calls["getCreated"],
-            "start": metadata_calls["getStart"],
-            "end_phase1": metadata_calls["getPhase1End"],
-            "end_phase2": metadata_calls["getPhase2End"],
-            "expires": metadata_calls["getExpires"],
-            "votes_for": solidity.to_float(metadata_calls["getVotingPowerFor"]),
-            "votes_against": solidity.to_float(metadata_calls["getVotingPowerAgainst"]),
-            "votes_veto": solidity.to_float(metadata_calls["getVotingPowerVeto"]),
-            "votes_abstain": solidity.to_float(metadata_calls["getVotingPowerAbstained"]),
-            "quorum": solidity.to_float(metadata_calls["getVotingPowerRequired"]),
-            "veto_quorum": solidity.to_float(metadata_calls["getVetoQuorum"])
-        }
+        getters = (
+            proposal_contract.functions.getVotingPowerFor,
+            proposal_contract.functions.getVotingPowerAgainst,
+            proposal_contract.functions.getVotingPowerVeto,
+            proposal_contract.functions.getVotingPowerAbstained
+        )
+        results = rp.multicall.aggregate([
+            getter(proposal_id) for proposal_id in proposal_ids for getter in getters
+        ]).results if proposal_ids else []
+        return [
+            {
+                "votes_for": solidity.to_float(results[i * len(getters)].results[0]),
+                "votes_against": solidity.to_float(results[i * len(getters) + 1].results[0]),
+                "votes_veto": solidity.to_float(results[i * len(getters) + 2].results[0]),
+                "votes_abstain": solidity.to_float(results[i * len(getters) + 3].results[0])
+            } for i in range(len(proposal_ids))
+        ]
 
     def _build_vote_graph(self, proposal: dict) -> str:
         votes_total = proposal["votes_for"] + proposal["votes_against"] + proposal["votes_abstain"]
 
-        graph = tpl.figure()
-        graph.barh(
+        main_graph_repr = "\n".join(render_barh(
             [
                 round(proposal["votes_for"]),
                 round(proposal["votes_against"]),
@@ -209,11 +295,9 @@ class ProtocolDAO(DAO):
             ],
             ["For", "Against", "Abstain", ""],
             max_width=20
-        )
-        main_graph_repr = "\n".join(graph.get_string().split("\n")[:-1])
+        )[:-1])
 
-        graph = tpl.figure()
-        graph.barh(
+        veto_graph_bars = render_barh(
             [
                 round(proposal["votes_veto"]),
                 round(max(proposal["votes_veto"], proposal["veto_quorum"]))
@@ -221,7 +305,6 @@ class ProtocolDAO(DAO):
             [f"{'Veto' : <{len('Against')}}", ""],
             max_width=20
         )
-        veto_graph_bars = graph.get_string().split("\n")
         veto_graph_repr = f"{veto_graph_bars[0] : <{len(veto_graph_bars[1])}}▏"
         main_quorum_pct = round(100 * votes_total / proposal["quorum"], 2)
         veto_quorum_pct = round(100 * proposal["votes_veto"] / proposal["veto_quorum"], 2)
@@ -0,0 +1,8 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from utils.cfg import cfg
+
+# shared Motor client; every additional client spawns its own connection
+# pool and monitor tasks, so cogs should reuse this one
+mongo = AsyncIOMotorClient(cfg["mongodb_uri"])
+db = mongo.get_database("rocketwatch")
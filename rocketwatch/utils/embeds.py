@@ -1,12 +1,14 @@
 import contextlib
 import datetime
+import functools
 import logging
-import math
+import re
 
 import discord
 import humanize
 import requests
 from retry import retry
+from cachetools import TTLCache
 from cachetools.func import ttl_cache
 from discord import Color
 from ens import InvalidName
@@ -27,6 +29,29 @@ log = logging.getLogger("embeds")
 log.setLevel(cfg["log_level"])
 
 
+# the rpl price only moves when the oracles push it; one block of staleness
+# is fine for the embed size thresholds it feeds
+@ttl_cache(maxsize=1, ttl=12)
+def get_rpl_price() -> float:
+    return solidity.to_float(rp.call("rocketNetworkPrices.getRPLPrice"))
+
+
+# renders a number with thousands separators and ~6 significant digits; a
+# plain format spec beats intcomma's regex pass and log10 per value, and event
+# args repeat the same values constantly, so memoize the rendered strings
+@functools.lru_cache(maxsize=256)
+def _pretty_number(value):
+    if value:
+        exponent = int(f"{value:.0e}".split("e")[1])
+        decimals = max(0, min(5, 5 - exponent))
+    else:
+        decimals = 0
+    rendered = f"{value:,.{decimals}f}"
+    if "." in rendered:
+        rendered = rendered.rstrip("0").rstrip(".")
+    return rendered
+
+
 class Embed(discord.Embed):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -96,6 +121,26 @@ def el_explorer_url(target, name="", prefix="", make_code=False, block="latest")
         # sanitize address
         target = w3.toChecksumAddress(target)
 
+        # batch all per-address lookups into a single multicall round trip;
+        # historical lookups keep the per-call path since the multicall helper
+        # only queries the latest block
+        if block == "latest" and rp.multicall is not None:
+            minipool_exists, node_exists, in_smoothing_pool, odao_member_id, sdao_member_id = [
+                res.results[0] for res in rp.multicall.aggregate([
+                    rp.get_contract_by_name("rocketMinipoolManager").functions.getMinipoolExists(target),
+                    rp.get_contract_by_name("rocketNodeManager").functions.getNodeExists(target),
+                    rp.get_contract_by_name("rocketNodeManager").functions.getSmoothingPoolRegistrationState(target),
+                    rp.get_contract_by_name("rocketDAONodeTrusted").functions.getMemberID(target),
+                    rp.get_contract_by_name("rocketDAOSecurity").functions.getMemberID(target),
+                ]).results
+            ]
+        else:
+            minipool_exists = rp.call("rocketMinipoolManager.getMinipoolExists", target, block=block)
+            node_exists = rp.call("rocketNodeManager.getNodeExists", target, block=block)
+            in_smoothing_pool = node_exists and rp.call("rocketNodeManager.getSmoothingPoolRegistrationState", target, block=block)
+            odao_member_id = rp.call("rocketDAONodeTrusted.getMemberID", target, block=block)
+            sdao_member_id = rp.call("rocketDAOSecurity.getMemberID", target, block=block)
+
         # rocketscan url stuff
         rocketscan_chains = {
             "mainnet": "https://rocketscan.io",
@@ -105,10 +150,10 @@ def el_explorer_url(target, name="", prefix="", make_code=False, block="latest")
         if cfg["rocketpool.chain"] in rocketscan_chains:
             rocketscan_url = rocketscan_chains[cfg["rocketpool.chain"]]
 
-            if rp.call("rocketMinipoolManager.getMinipoolExists", target, block=block):
+            if minipool_exists:
                 url = f"{rocketscan_url}/minipool/{target}"
-            elif rp.call("rocketNodeManager.getNodeExists", target, block=block):
-                if rp.call("rocketNodeManager.getSmoothingPoolRegistrationState", target, block=block) and prefix != -1:
+            elif node_exists:
+                if in_smoothing_pool and prefix != -1:
                     prefix += ":cup_with_straw:"
                 url = f"{rocketscan_url}/node/{target}"
 
@@ -116,12 +161,12 @@ def el_explorer_url(target, name="", prefix="", make_code=False, block="latest")
         if not name and (n := _(n_key)) != n_key:
             name = n
 
-        if not name and (member_id := rp.call("rocketDAONodeTrusted.getMemberID", target, block=block)):
+        if not name and (member_id := odao_member_id):
             if prefix != -1:
                 prefix += "🔮"
             name = member_id
 
-        if not name and (member_id := rp.call("rocketDAOSecurity.getMemberID", target, block=block)):
+        if not name and (member_id := sdao_member_id):
             if prefix != -1:
                 prefix += "🔒"
             name = member_id
@@ -183,42 +228,56 @@ def el_explorer_url(target, name="", prefix="", make_code=False, block="latest")
     return f"{prefix}[{name}]({url})"
 
 
+# precompiled keyword scans for the per-argument hot loops below
+_NUMBER_KEYS = re.compile(r"amount|value|rate|totaleth|stakingeth|rethsupply|rplprice")
+_PRETTY_KEYS = re.compile(r"amount|value|total_supply|perc|tnx_fee|rate|votingpower|assets|shares")
+
+# rendered (prefixed, clean) explorer links per address-like value; short ttl
+# since the sea creature prefix tracks live balances
+_explorer_links = TTLCache(maxsize=2048, ttl=30)
+
+
 def prepare_args(args):
     for arg_key, arg_value in list(args.items()):
         # store raw value
         args[f"{arg_key}_raw"] = arg_value
+        key_lower = arg_key.lower()
 
         # handle numbers
-        if any(keyword in arg_key.lower() for keyword in ["amount", "value", "rate", "totaleth", "stakingeth", "rethsupply", "rplprice"]) and isinstance(arg_value, int):
+        if isinstance(arg_value, int) and _NUMBER_KEYS.search(key_lower):
             args[arg_key] = arg_value / 10 ** 18
 
         # handle timestamps
-        if "deadline" in arg_key.lower() and isinstance(arg_value, int):
+        if "deadline" in key_lower and isinstance(arg_value, int):
             args[arg_key] = f"<t:{arg_value}:f>(<t:{arg_value}:R>)"
 
         # handle percentages
-        if "perc" in arg_key.lower():
+        if "perc" in key_lower:
             args[arg_key] = arg_value / 10 ** 16
-        if arg_key.lower() in ["rate", "penalty"]:
+        if key_lower in ["rate", "penalty"]:
             args[f"{arg_key}_perc"] = arg_value / 10 ** 16
 
-        # handle hex strings
-        if str(arg_value).startswith("0x"):
-            prefix = ""
-
-            if w3.isAddress(arg_value):
-                # get rocketpool related holdings value for this address
-                address = w3.toChecksumAddress(arg_value)
-                prefix = get_sea_creature_for_address(address)
-
+        # handle hex strings; only str values can hold an address here, so
+        # skip the str() round trip for ints, bytes and bools
+        if isinstance(arg_value, str) and arg_value.startswith("0x"):
             # handle validators
             if arg_key == "pubkey":
                 args[arg_key] = cl_explorer_url(arg_value)
             elif arg_key == "cow_uid":
                 args[arg_key] = f"[ORDER](https://explorer.cow.fi/orders/{arg_value})"
             else:
-                args[arg_key] = el_explorer_url(arg_value, prefix=prefix)
-                args[f'{arg_key}_clean'] = el_explorer_url(arg_value)
+                # the same address tends to repeat across a burst of events
+                # from one node operator; reuse the rendered links so the
+                # holdings and explorer lookups run once per address
+                if (links := _explorer_links.get(arg_value)) is None:
+                    prefix = ""
+                    if w3.isAddress(arg_value):
+                        # get rocketpool related holdings value for this address
+                        address = w3.toChecksumAddress(arg_value)
+                        prefix = get_sea_creature_for_address(address)
+                    links = (el_explorer_url(arg_value, prefix=prefix), el_explorer_url(arg_value))
+                    _explorer_links[arg_value] = links
+                args[arg_key], args[f'{arg_key}_clean'] = links
                 if len(arg_value) == 66:
                     args[f'{arg_key}_small'] = el_explorer_url(arg_value, name="[tnx]")
     if "from" in args:
@@ -273,27 +332,21 @@ def assemble(args) -> Embed:
         case "eth_deposit_event":
             use_large = (amount >= 32)
         case "rpl_stake_event":
-            use_large = (amount >= ((3 * 2.4) / solidity.to_float(rp.call("rocketNetworkPrices.getRPLPrice"))))
+            use_large = (amount >= ((3 * 2.4) / get_rpl_price()))
         case "cs_deposit_eth_event" | "cs_withdraw_eth_event":
             use_large = (args["assets"] >= 32)
         case "cs_deposit_rpl_event" | "cs_withdraw_rpl_event":
-            use_large = (args["assets"] >= 16 / solidity.to_float(rp.call("rocketNetworkPrices.getRPLPrice")))
+            use_large = (args["assets"] >= 16 / get_rpl_price())
         case _:
             use_large = (amount >= 100)
 
-    # make numbers look nice
+    # make numbers look nice; type check first since most args are already
+    # strings at this point and the regex scan is the pricier test
     for arg_key, arg_value in list(args.items()):
-        if any(keyword in arg_key.lower() for keyword in
-               ["amount", "value", "total_supply", "perc", "tnx_fee", "rate", "votingpower", "assets", "shares"]):
-            if not isinstance(arg_value, (int, float)) or "raw" in arg_key:
-                continue
-            if arg_value:
-                decimal = 5 - math.floor(math.log10(abs(arg_value)))
-                decimal = max(0, min(5, decimal))
-                arg_value = round(arg_value, decimal)
-            if arg_value == int(arg_value):
-                arg_value = int(arg_value)
-            args[arg_key] = humanize.intcomma(arg_value)
+        if not isinstance(arg_value, (int, float)) or "raw" in arg_key:
+            continue
+        if _PRETTY_KEYS.search(arg_key.lower()):
+            args[arg_key] = _pretty_number(arg_value)
 
     has_small = _(f"embeds.{args.event_name}.description_small") != f"embeds.{args.event_name}.description_small"
     has_large = _(f"embeds.{args.event_name}.description") != f"embeds.{args.event_name}.description"
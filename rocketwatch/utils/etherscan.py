@@ -1,6 +1,7 @@
 import logging
 
 import aiohttp
+import orjson
 
 from utils.cfg import cfg
 from utils.shared_w3 import w3
@@ -8,41 +9,52 @@ from utils.shared_w3 import w3
 log = logging.getLogger("etherscan")
 log.setLevel(cfg["log_level"])
 
+# lazily created so connections (dns + tls) are reused across calls
+_session: aiohttp.ClientSession | None = None
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+    return _session
+
 
 async def get_recent_account_transactions(address, block_count=44800):
     ETHERSCAN_URL = "https://api.etherscan.io/api"
 
-    highest_block = w3.eth.get_block("latest")["number"]
+    highest_block = w3.eth.get_block_number()
     page = 1
     lowest_block = highest_block - block_count
 
-    async with aiohttp.ClientSession() as session:
-        resp = await session.get(ETHERSCAN_URL, params={"address"   : address,
-                                                        "page"      : page,
-                                                        "apikey"    : cfg["rocketpool.etherscan_secret"],
-                                                        "module"    : "account",
-                                                        "action"    : "txlist",
-                                                        "sort"      : "desc",
-                                                        "startblock": lowest_block,
-                                                        "endblock"  : highest_block})
-
-        if not resp.status == 200:
-            log.debug(
-                f"Error querying etherscan, unexpected HTTP {str(resp.status)}")
-            return
-
-        parsed = await resp.json()
-        if "message" not in parsed or not parsed["message"].lower() == "ok":
-            error = parsed["message"] if "message" in parsed else ""
-            r = parsed["result"] if "result" in parsed else ""
-            log.debug(f"Error querying {resp.url} - {error} - {r}")
-            return
-
-        def valid_tx(tx):
-            if not tx["to"] == address.lower():
-                return False
-            if not int(tx["isError"]) == 0:
-                return False
-            return True
-
-        return {result["hash"]: result for result in parsed["result"] if valid_tx(result)}
+    session = await _get_session()
+    resp = await session.get(ETHERSCAN_URL, params={"address"   : address,
+                                                    "page"      : page,
+                                                    "apikey"    : cfg["rocketpool.etherscan_secret"],
+                                                    "module"    : "account",
+                                                    "action"    : "txlist",
+                                                    "sort"      : "desc",
+                                                    "startblock": lowest_block,
+                                                    "endblock"  : highest_block})
+
+    if not resp.status == 200:
+        log.debug(
+            f"Error querying etherscan, unexpected HTTP {str(resp.status)}")
+        return
+
+    # responses can run into the megabytes; decode the raw bytes with orjson
+    parsed = orjson.loads(await resp.read())
+    if "message" not in parsed or not parsed["message"].lower() == "ok":
+        error = parsed["message"] if "message" in parsed else ""
+        r = parsed["result"] if "result" in parsed else ""
+        log.debug(f"Error querying {resp.url} - {error} - {r}")
+        return
+
+    address_lc = address.lower()
+    return {
+        result["hash"]: result for result in parsed["result"]
+        if result["to"] == address_lc and int(result["isError"]) == 0
+    }
@@ -19,7 +19,7 @@ def get_block_by_timestamp(timestamp):
     history = []
     error_map = {}
     i_pre = 1
-    i_latest = w3.eth.get_block('latest')['number']
+    i_latest = w3.eth.get_block_number()
     i_post = i_latest
     log.debug(f"Looking for block with timestamp {timestamp}")
     while (i_pre, i_post) not in history:
@@ -104,9 +104,8 @@ def render_branch(k, v, prefix, current_depth=0, max_depth=0, reverse=False, m_p
         for i, (sk, sv) in enumerate(v.items()):
             p = prefix
             if p and p[-2] == m_prev:
-                p = p[::-1]
-                p = p.replace(f"─{m_prev}", "  " if m == m_prev else " │", 1)
-                p = p[::-1]
+                # swap the trailing connector of the parent prefix for a pass-through
+                p = p[:-2] + ("  " if m == m_prev else "│ ")
             p += "├─" if i != len(v) - 1 else f"{m}─"  # last connection
             if not reverse:
                 a = list(render_branch(sk, sv, p, current_depth + 1, max_depth=max_depth, reverse=False, m_prev=m)) + a
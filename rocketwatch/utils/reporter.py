@@ -12,15 +12,34 @@ log = logging.getLogger("reporter")
 log.setLevel(cfg["log_level"])
 bot = None
 
+# errors are queued and sent by a background task so the failing code path
+# never waits on discord; bounded so an error storm can't eat all memory
+_error_queue: asyncio.Queue = None
+_drain_task: asyncio.Task = None
+
 
 def format_stacktrace(error):
     return "".join(traceback.format_exception(type(error), error, error.__traceback__))
 
-async def wait_and_execute(func, *args, delay=5, **kwargs):
-    await asyncio.sleep(delay)
-    await func(*args, **kwargs)
 
-async def report_error(excep, *args, ctx=None, retry_count=0, max_retries=5, delay=5):
+async def _drain_errors():
+    channel = await get_or_fetch_channel(bot, cfg["discord.channels.errors"])
+    while True:
+        desc, details = await _error_queue.get()
+        for delay in [5, 10, 20, 40, 80]:
+            try:
+                with io.StringIO(details) as f:
+                    await channel.send(desc, file=File(fp=f, filename="exception.txt"))
+                break
+            except Exception as e:
+                log.warning(f"Failed to send message. Retrying in {delay} seconds. {e}")
+                await asyncio.sleep(delay)
+        else:
+            log.error("Failed to send message. Max retries reached.")
+        _error_queue.task_done()
+
+
+async def report_error(excep, *args, ctx=None):
     desc = f"**`{repr(excep)[:100]}`**\n"
     if args:
         desc += "```"
@@ -39,15 +58,14 @@ async def report_error(excep, *args, ctx=None, retry_count=0, max_retries=5, del
     log.error(details)
     if not bot:
         log.warning("cant send error as bot variable not initialized")
-    channel = await get_or_fetch_channel(bot, cfg["discord.channels.errors"])
+        return
 
+    global _error_queue, _drain_task
+    if _error_queue is None:
+        _error_queue = asyncio.Queue(maxsize=256)
+    if _drain_task is None or _drain_task.done():
+        _drain_task = asyncio.create_task(_drain_errors())
     try:
-        with io.StringIO(details) as f:
-            await channel.send(desc, file=File(fp=f, filename="exception.txt"))
-    except Exception as e:
-        if retry_count < max_retries:
-            log.warning(f"Failed to send message. Retrying in {delay} seconds. {e}")
-            asyncio.create_task(wait_and_execute(report_error, excep, *args, ctx=ctx, retry_count=retry_count+1, delay=delay))
-        else:
-            log.error(f"Failed to send message. Max retries reached. {e}")
-
+        _error_queue.put_nowait((desc, details))
+    except asyncio.QueueFull:
+        log.warning("error queue full, dropping error report")
@@ -3,7 +3,7 @@ import os
 import warnings
 
 from bidict import bidict
-from cachetools import cached, FIFOCache
+from cachetools import cached, FIFOCache, TTLCache
 from cachetools.func import ttl_cache
 from multicall import Call, constants
 from multicall import Multicall
@@ -21,10 +21,26 @@ from utils.time_debug import timerun
 log = logging.getLogger("rocketpool")
 log.setLevel(cfg["log_level"])
 
+# processReceipt warns about receipt logs that don't match the event abi;
+# filter the message once instead of toggling warning state per call
+warnings.filterwarnings("ignore", message=r"The log with transaction hash: .*", category=UserWarning)
+
 # no address found exception
 class NoAddressFound(Exception):
     pass
 
+# view functions whose results barely (or never) change; mapped to a ttl in
+# seconds, or None if the result is immutable and can be kept forever
+CACHEABLE_CALLS = {
+    "rocketDAONodeTrusted.getMemberID"            : 3600,
+    "rocketDAOProposal.getMessage"                : None,
+    # reward period parameters only move at interval rollover (~28 days)
+    "rocketRewardsPool.getClaimIntervalRewardsTotal": 3600,
+    "rocketRewardsPool.getClaimIntervalTimeStart"   : 3600,
+    "rocketRewardsPool.getClaimIntervalTime"        : 3600,
+    "rocketRewardsPool.getClaimingContractPerc"     : 3600,
+}
+
 class RocketPool:
     ADDRESS_CACHE = FIFOCache(maxsize=2048)
     ABI_CACHE = FIFOCache(maxsize=2048)
@@ -33,6 +49,8 @@ class RocketPool:
     def __init__(self):
         self.addresses = bidict()
         self.multicall = None
+        self._view_cache = TTLCache(maxsize=4096, ttl=3600)
+        self._immutable_cache = {}
         self.flush()
 
     def flush(self):
@@ -40,6 +58,8 @@ class RocketPool:
         self.CONTRACT_CACHE.clear()
         self.ABI_CACHE.clear()
         self.ADDRESS_CACHE.clear()
+        self._view_cache.clear()
+        self._immutable_cache.clear()
         self.addresses = bidict()
         try:
             # add multicall3 address
@@ -191,13 +211,22 @@ class RocketPool:
 
     def call(self, path, *args, block="latest", address=None, mainnet=False):
         log.debug(f"Calling {path} (block={block})")
-        return self.get_function(path, *args, historical=block != "latest", address=address, mainnet=mainnet).call(block_identifier=block)
+        # serve whitelisted view calls from memory; only safe for head queries
+        # against the canonical contract, historical lookups go to the node
+        cacheable = (block == "latest") and not address and not mainnet and (path in CACHEABLE_CALLS)
+        if cacheable:
+            cache = self._immutable_cache if CACHEABLE_CALLS[path] is None else self._view_cache
+            key = (path, args)
+            if key in cache:
+                return cache[key]
+        result = self.get_function(path, *args, historical=block != "latest", address=address, mainnet=mainnet).call(block_identifier=block)
+        if cacheable:
+            cache[key] = result
+        return result
 
     def get_pubkey_using_transaction(self, receipt):
-        # will throw some warnings about other events but those are safe to ignore since we don't need those anyways
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            processed_logs = self.get_contract_by_name("casperDeposit").events.DepositEvent().processReceipt(receipt)
+        # non-matching events are safe to ignore since we don't need those anyways
+        processed_logs = self.get_contract_by_name("casperDeposit").events.DepositEvent().processReceipt(receipt)
 
         # attempt to retrieve the pubkey
         if processed_logs:
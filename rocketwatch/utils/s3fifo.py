@@ -0,0 +1,82 @@
+import time
+
+from collections import OrderedDict
+
+
+class S3FIFO:
+    """
+    Bounded membership cache using the S3-FIFO admission policy.
+
+    New keys enter a small probationary FIFO (~10% of `capacity`); keys evicted
+    from it without further hits are only remembered in a ghost FIFO of bare
+    keys. A key that gets hit again while probationary, or that returns while
+    still in the ghost, is promoted to the main FIFO (~90%), so one-hit wonders
+    never displace established entries. Entries additionally expire `ttl`
+    seconds after insertion, mirroring the TTLCache interface it replaces.
+    """
+
+    def __init__(self, capacity: int = 4096, ttl: float = 900):
+        self.ttl = ttl
+        self.small_capacity = max(1, capacity // 10)
+        self.main_capacity = capacity - self.small_capacity
+        self.ghost_capacity = capacity
+        # key -> expiry, insertion-ordered so popitem(last=False) is the FIFO head
+        self.small: OrderedDict = OrderedDict()
+        self.main: OrderedDict = OrderedDict()
+        # keys only, no values
+        self.ghost: OrderedDict = OrderedDict()
+        # access counts, capped at 3
+        self.freq: dict = {}
+
+    def __contains__(self, key) -> bool:
+        now = time.monotonic()
+        for store in (self.small, self.main):
+            if (expiry := store.get(key)) is not None:
+                if expiry < now:
+                    del store[key]
+                    self.freq.pop(key, None)
+                    return False
+                self.freq[key] = min(self.freq.get(key, 0) + 1, 3)
+                return True
+        return False
+
+    def __setitem__(self, key, value) -> None:
+        # the stored value is irrelevant, this is a membership cache
+        expiry = time.monotonic() + self.ttl
+        if key in self.small:
+            self.small[key] = expiry
+        elif key in self.main:
+            self.main[key] = expiry
+        elif key in self.ghost:
+            # recently evicted once, readmit straight into the main FIFO
+            del self.ghost[key]
+            self._evict_main()
+            self.main[key] = expiry
+            self.freq[key] = 0
+        else:
+            self._evict_small()
+            self.small[key] = expiry
+            self.freq[key] = 0
+
+    def _evict_small(self) -> None:
+        while len(self.small) >= self.small_capacity:
+            key, expiry = self.small.popitem(last=False)
+            if self.freq.get(key, 0) > 1 and expiry >= time.monotonic():
+                # seen again while probationary, promote
+                self._evict_main()
+                self.main[key] = expiry
+            else:
+                self.freq.pop(key, None)
+                self.ghost[key] = None
+                while len(self.ghost) > self.ghost_capacity:
+                    self.ghost.popitem(last=False)
+
+    def _evict_main(self) -> None:
+        while len(self.main) >= self.main_capacity:
+            key, expiry = self.main.popitem(last=False)
+            if self.freq.get(key, 0) > 0 and expiry >= time.monotonic():
+                # still warm, give it another lap instead of evicting
+                self.freq[key] -= 1
+                self.main[key] = expiry
+            else:
+                self.freq.pop(key, None)
@@ -57,24 +57,24 @@ def get_holding_for_address(address):
 
     # get their eth balance
     eth_balance = solidity.to_float(w3.eth.getBalance(address))
-    # get ERC-20 token balance for this address
+    # token balances plus node staking positions, all in one multicall
     with contextlib.suppress(Exception):
-        resp = rp.multicall.aggregate(
-            rp.get_contract_by_name(name).functions.balanceOf(address) for name in
-            ["rocketTokenRPL", "rocketTokenRPLFixedSupply", "rocketTokenRETH"]
-        )
+        node_staking = rp.get_contract_by_name("rocketNodeStaking")
+        resp = rp.multicall.aggregate([
+            rp.get_contract_by_name("rocketTokenRPL").functions.balanceOf(address),
+            rp.get_contract_by_name("rocketTokenRPLFixedSupply").functions.balanceOf(address),
+            rp.get_contract_by_name("rocketTokenRETH").functions.balanceOf(address),
+            node_staking.functions.getNodeETHProvided(address),
+            node_staking.functions.getNodeRPLStake(address),
+        ])
+        rpl, rpl_fixed, reth, eth_provided, staked_rpl = (r.results[0] for r in resp.results)
         # add their tokens to their eth balance
-        for token in resp.results:
-            contract_name = rp.get_name_by_address(token.contract_address)
-            if "RPL" in contract_name:
-                eth_balance += solidity.to_float(token.results[0]) * price_cache["rpl_price"]
-            if "RETH" in contract_name:
-                eth_balance += solidity.to_float(token.results[0]) * price_cache["reth_price"]
-    # add eth they provided for minipools
-    eth_balance += solidity.to_int(rp.call("rocketNodeStaking.getNodeETHProvided", address))
-    # add their staked RPL
-    staked_rpl = solidity.to_int(rp.call("rocketNodeStaking.getNodeRPLStake", address))
-    eth_balance += staked_rpl * price_cache["rpl_price"]
+        eth_balance += solidity.to_float(rpl + rpl_fixed) * price_cache["rpl_price"]
+        eth_balance += solidity.to_float(reth) * price_cache["reth_price"]
+        # add eth they provided for minipools
+        eth_balance += solidity.to_int(eth_provided)
+        # add their staked RPL
+        eth_balance += solidity.to_int(staked_rpl) * price_cache["rpl_price"]
     return eth_balance
 
 
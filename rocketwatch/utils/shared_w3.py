@@ -2,28 +2,95 @@ import logging
 import math
 
 import circuitbreaker
+import orjson
 import requests
+from hexbytes import HexBytes
 from requests import HTTPError, ConnectTimeout
+from requests.adapters import HTTPAdapter
 from retry import retry
 from web3 import Web3, HTTPProvider
+from web3._utils.request import make_post_request
 from web3.beacon import Beacon as Bacon
+from web3.datastructures import AttributeDict
 from web3.middleware import geth_poa_middleware
+from web3.providers import JSONBaseProvider
 
 from utils.cfg import cfg
 
 log = logging.getLogger("shared_w3")
 log.setLevel(cfg["log_level"])
 
-w3 = Web3(HTTPProvider(cfg['rocketpool.execution_layer.endpoint.current'], request_kwargs={'timeout': 60}))
+
+def _json_default(obj):
+    # mirrors web3's Web3JsonEncoder for the types that show up in rpc params
+    if isinstance(obj, AttributeDict):
+        return {**obj}
+    if isinstance(obj, HexBytes):
+        return obj.hex()
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+
+def _encode_rpc_request(self, method, params) -> bytes:
+    return orjson.dumps({
+        "jsonrpc": "2.0",
+        "method" : method,
+        "params" : params or [],
+        "id"     : next(self.request_counter),
+    }, default=_json_default)
+
+
+def _decode_rpc_response(self, raw_response):
+    return orjson.loads(raw_response)
+
+
+# swap web3's stdlib-json rpc codec for orjson; every eth_call, multicall
+# aggregate and log batch is encoded/decoded through these two methods
+JSONBaseProvider.encode_rpc_request = _encode_rpc_request
+JSONBaseProvider.decode_rpc_response = _decode_rpc_response
+
+
+def rpc_batch(web3_instance: Web3, calls: list[tuple]) -> list:
+    # POST a list of (method, params) pairs as one JSON-RPC batch request,
+    # returning the results in call order; errors come back as None
+    provider = web3_instance.provider
+    payload = orjson.dumps([
+        {"jsonrpc": "2.0", "method": method, "params": params, "id": i}
+        for i, (method, params) in enumerate(calls)
+    ], default=_json_default)
+    raw = make_post_request(provider.endpoint_uri, payload, **provider.get_request_kwargs())
+    responses = orjson.loads(raw)
+    if isinstance(responses, dict):
+        # the node rejected the batch as a whole
+        raise ValueError(f"batch rpc request failed: {responses.get('error')}")
+    results = [None] * len(calls)
+    for response in responses:
+        if "error" in response:
+            log.error(f"batch rpc call {calls[response['id']][0]} failed: {response['error']}")
+            continue
+        results[response["id"]] = response.get("result")
+    return results
+
+
+def _pooled_session() -> requests.Session:
+    # RPC calls fan out from multiple worker threads; the default pool of 10
+    # keep-alive connections would discard and re-handshake anything beyond that
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+w3 = Web3(HTTPProvider(cfg['rocketpool.execution_layer.endpoint.current'], request_kwargs={'timeout': 60}, session=_pooled_session()))
 mainnet_w3 = w3
 
 if cfg['rocketpool.chain'] != "mainnet":
-    mainnet_w3 = Web3(HTTPProvider(cfg['rocketpool.execution_layer.endpoint.mainnet']))
+    mainnet_w3 = Web3(HTTPProvider(cfg['rocketpool.execution_layer.endpoint.mainnet'], session=_pooled_session()))
     w3.middleware_onion.inject(geth_poa_middleware, layer=0)
 
 historical_w3 = None
 if "historical" in cfg['rocketpool.execution_layer.endpoint'].keys():
-    historical_w3 = Web3(HTTPProvider(cfg['rocketpool.execution_layer.endpoint.historical']))
+    historical_w3 = Web3(HTTPProvider(cfg['rocketpool.execution_layer.endpoint.historical'], session=_pooled_session()))
 
 endpoints = cfg["rocketpool.consensus_layer.endpoints"]
 tmp = []
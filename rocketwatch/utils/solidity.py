@@ -11,12 +11,16 @@ BEACON_START_DATE = 1606824023
 BEACON_EPOCH_LENGTH = 12 * 32
 
 
+# precomputed for the default case so hot paths skip the bigint exponentiation
+_WEI = 10 ** 18
+
+
 def to_float(n, decimals=18):
-    return int(n) / 10 ** decimals
+    return int(n) / (_WEI if decimals == 18 else 10 ** decimals)
 
 
 def to_int(n, decimals=18):
-    return int(n) // 10 ** decimals
+    return int(n) // (_WEI if decimals == 18 else 10 ** decimals)
 
 
 def beacon_block_to_date(block_num):
@@ -134,10 +134,16 @@ def get_unclaimed_rpl_reward_nodes():
     }}
 }}
     """
-    # get reward period start
-    reward_start = rp.call("rocketRewardsPool.getClaimIntervalTimeStart")
-    # duration left
-    reward_duration = rp.call("rocketRewardsPool.getClaimIntervalTime")
+    # batch all required chain reads into a single rpc request
+    rewards_pool = rp.get_contract_by_name("rocketRewardsPool")
+    network_prices = rp.get_contract_by_name("rocketNetworkPrices")
+    reward_start, reward_duration, effective_rpl_stake = [
+        r.results[0] for r in rp.multicall.aggregate([
+            rewards_pool.functions.getClaimIntervalTimeStart(),
+            rewards_pool.functions.getClaimIntervalTime(),
+            network_prices.functions.getEffectiveRPLStake()
+        ]).results
+    ]
     reward_end = reward_start + reward_duration
     # get timestamp 28 days from the last possible claim date
     timestamp = reward_end - (solidity.days * 28)
@@ -163,7 +169,7 @@ def get_unclaimed_rpl_reward_nodes():
 
     total_rewards = solidity.to_float(data["rplrewardIntervals"][0]["claimableNodeRewards"])
     claimed_rewards = solidity.to_float(data["rplrewardIntervals"][0]["totalNodeRewardsClaimed"])
-    total_rpl_staked = solidity.to_float(rp.call("rocketNetworkPrices.getEffectiveRPLStake"))
+    total_rpl_staked = solidity.to_float(effective_rpl_stake)
 
     # get theoretical rewards per staked RPL
     reward_per_staked_rpl = total_rewards / total_rpl_staked
@@ -205,10 +211,16 @@ def get_unclaimed_rpl_reward_odao():
     }}
 }}
     """
-    # get reward period start
-    reward_start = rp.call("rocketRewardsPool.getClaimIntervalTimeStart")
-    # duration left
-    reward_duration = rp.call("rocketRewardsPool.getClaimIntervalTime")
+    # batch all required chain reads into a single rpc request
+    rewards_pool = rp.get_contract_by_name("rocketRewardsPool")
+    dao_node_trusted = rp.get_contract_by_name("rocketDAONodeTrusted")
+    reward_start, reward_duration, total_odao_members = [
+        r.results[0] for r in rp.multicall.aggregate([
+            rewards_pool.functions.getClaimIntervalTimeStart(),
+            rewards_pool.functions.getClaimIntervalTime(),
+            dao_node_trusted.functions.getMemberCount()
+        ]).results
+    ]
     reward_end = reward_start + reward_duration
     # get timestamp 28 days from the last possible claim date
     timestamp = reward_end - (solidity.days * 28)
@@ -236,7 +248,6 @@ def get_unclaimed_rpl_reward_odao():
     # get total rewards
     total_rewards = solidity.to_float(data["rplrewardIntervals"][0]["claimableODAORewards"])
     claimed_rewards = solidity.to_float(data["rplrewardIntervals"][0]["totalODAORewardsClaimed"])
-    total_odao_members = rp.call("rocketDAONodeTrusted.getMemberCount")
 
     # get theoretical rewards per member
     reward_per_member = total_rewards / total_odao_members